@@ -0,0 +1,248 @@
+# api/accounts_client.py
+import fcntl
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import requests
+from django.conf import settings
+
+from .http_client import PooledHttpClient, http_client
+
+logger = logging.getLogger("asset.accounts_client")
+
+ACCOUNTS_TIMEOUT = float(os.getenv("ACCOUNTS_HTTP_TIMEOUT", "10"))
+ACCOUNTS_RETRIES = int(os.getenv("ACCOUNTS_HTTP_RETRIES", "2"))
+ACCOUNTS_BACKOFF = float(os.getenv("ACCOUNTS_HTTP_BACKOFF", "0.2"))
+ACCOUNTS_BREAKER_THRESHOLD = int(os.getenv("ACCOUNTS_BREAKER_THRESHOLD", "5"))
+ACCOUNTS_BREAKER_RESET = int(os.getenv("ACCOUNTS_BREAKER_RESET", "30"))
+ACCOUNTS_LKG_PATH = os.getenv(
+    "ACCOUNTS_LKG_PATH", os.path.join(settings.STATE_DIR, "accounts_lkg.json")
+)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class AccountsUnavailableError(RuntimeError):
+    """Accounts could not be reached: breaker open, transport error, or 5xx after retries."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After ``threshold`` consecutive failures the breaker opens and rejects calls for
+    ``reset_timeout`` seconds. It then lets a single trial call through (half-open);
+    success closes it, failure opens it again.
+    """
+
+    def __init__(self, threshold: int = ACCOUNTS_BREAKER_THRESHOLD, reset_timeout: int = ACCOUNTS_BREAKER_RESET) -> None:
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """
+        :return: True if a call may proceed now.
+        """
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN and time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            if self._trial_running:
+                return False
+            self._state = HALF_OPEN
+            self._trial_running = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._state == HALF_OPEN or self._failures >= self.threshold:
+                if self._state != OPEN:
+                    self.times_opened += 1
+                    logger.warning("Accounts circuit breaker opened after %s failures", self._failures)
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        state = self.state
+        with self._lock:
+            return {"state": state, "consecutive_failures": self._failures, "times_opened": self.times_opened}
+
+
+class LastKnownGoodStore:
+    """
+    Small JSON file of the last successful Accounts payload per client, shared by every
+    worker process on the host.
+
+    Writes hold an exclusive ``flock`` on a sibling ``.lock`` file, re-read the file and
+    merge into it, so concurrent workers never drop each other's entries; the result is
+    written atomically (temp file + rename) with owner-only permissions. Callers must not
+    store plaintext passwords in it.
+    """
+
+    def __init__(self, path: str = ACCOUNTS_LKG_PATH) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self._read().get(key)
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        with self._lock:
+            try:
+                with open(f"{self.path}.lock", "a") as lock:
+                    os.chmod(lock.name, 0o600)
+                    fcntl.flock(lock, fcntl.LOCK_EX)
+                    data = self._read()
+                    if data.get(key) == value:
+                        return
+                    data[key] = value
+                    directory = os.path.dirname(self.path) or "."
+                    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".lkg-")
+                    with os.fdopen(fd, "w") as fh:
+                        json.dump(data, fh)
+                    os.chmod(tmp, 0o600)
+                    os.replace(tmp, self.path)
+            except OSError:
+                logger.warning("Could not persist last-known-good Accounts data to %s", self.path, exc_info=True)
+
+    def _read(self) -> Dict[str, Any]:
+        try:
+            with open(self.path) as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return {}
+
+
+class AccountsClient:
+    """
+    HTTP GET client for the Accounts service with bounded retries, jittered backoff,
+    a circuit breaker and latency metrics. Requests reuse the shared keep-alive pool.
+
+    ``timeout`` is one deadline for the whole call: retries and backoff only use what is
+    left of it, so a slow Accounts never holds a caller longer than a single attempt would.
+    """
+
+    def __init__(
+        self,
+        http: PooledHttpClient = http_client,
+        timeout: float = ACCOUNTS_TIMEOUT,
+        retries: int = ACCOUNTS_RETRIES,
+        backoff: float = ACCOUNTS_BACKOFF,
+        breaker: Optional[CircuitBreaker] = None,
+    ) -> None:
+        self.http = http
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+        self._lock = threading.Lock()
+        self._metrics = {
+            "requests": 0,
+            "failures": 0,
+            "short_circuited": 0,
+            "latency_ms_total": 0.0,
+            "latency_ms_max": 0.0,
+            "latency_ms_last": 0.0,
+        }
+
+    def get(self, url: str, *, params: Optional[Dict[str, str]] = None, headers: Optional[Dict[str, str]] = None) -> requests.Response:
+        """
+        GET ``url``, retrying transport errors and 5xx responses within ``timeout`` seconds overall.
+
+        :param url: Absolute URL.
+        :param params: Query parameters.
+        :param headers: Request headers.
+        :return: The first response with a status below 500.
+        :raises AccountsUnavailableError: If the breaker is open or every attempt failed.
+        """
+        last_error = None
+        deadline = time.monotonic() + self.timeout
+        for attempt in range(self.retries + 1):
+            if not self.breaker.allow():
+                self._bump("short_circuited")
+                raise AccountsUnavailableError(f"Accounts circuit open ({last_error})" if last_error else "Accounts circuit open")
+            if attempt:
+                time.sleep(min(random.uniform(0, self.backoff * (2 ** attempt)), max(0.0, deadline - time.monotonic())))
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                last_error = f"{last_error}; no time left to retry" if last_error else "Accounts deadline exceeded"
+                break
+
+            started = time.monotonic()
+            try:
+                resp = self.http.get(url, headers=headers, params=params, timeout=remaining)
+            except requests.RequestException as e:
+                self._observe(started, ok=False)
+                self.breaker.record_failure()
+                last_error = f"Accounts request failed: {e}"
+                continue
+
+            if resp.status_code >= 500:
+                self._observe(started, ok=False)
+                self.breaker.record_failure()
+                last_error = f"Accounts error {resp.status_code}"
+                continue
+
+            self._observe(started, ok=True)
+            self.breaker.record_success()
+            return resp
+
+        raise AccountsUnavailableError(last_error)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        :return: Breaker state plus request, failure and upstream latency counters.
+        """
+        with self._lock:
+            metrics = dict(self._metrics)
+        metrics["latency_ms_avg"] = round(metrics["latency_ms_total"] / metrics["requests"], 1) if metrics["requests"] else 0.0
+        metrics["breaker"] = self.breaker.stats()
+        return metrics
+
+    def _observe(self, started: float, *, ok: bool) -> None:
+        elapsed = (time.monotonic() - started) * 1000
+        with self._lock:
+            self._metrics["requests"] += 1
+            if not ok:
+                self._metrics["failures"] += 1
+            self._metrics["latency_ms_total"] += elapsed
+            self._metrics["latency_ms_last"] = round(elapsed, 1)
+            self._metrics["latency_ms_max"] = max(self._metrics["latency_ms_max"], round(elapsed, 1))
+
+    def _bump(self, name: str) -> None:
+        with self._lock:
+            self._metrics[name] += 1
+
+
+accounts_client = AccountsClient()
+accounts_lkg = LastKnownGoodStore()
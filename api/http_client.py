@@ -0,0 +1,77 @@
+# api/http_client.py
+import logging
+import os
+from http.cookiejar import DefaultCookiePolicy
+from typing import Any, Dict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger("asset.http_client")
+
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "10"))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "20"))
+HTTP_POOL_BLOCK = os.getenv("HTTP_POOL_BLOCK", "0") == "1"
+
+
+class PooledHttpClient:
+    """
+    Process-wide keep-alive HTTP client for internal services.
+
+    Wraps one ``requests.Session`` whose adapter keeps up to ``pool_maxsize`` idle
+    connections per host, for up to ``pool_connections`` hosts. urllib3 pools are
+    thread-safe; the session's cookie jar is disabled so no per-call state is shared
+    between threads. With ``pool_block`` callers wait for a free connection instead of
+    opening (and then discarding) extra ones beyond ``pool_maxsize``.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = HTTP_POOL_CONNECTIONS,
+        pool_maxsize: int = HTTP_POOL_MAXSIZE,
+        pool_block: bool = HTTP_POOL_BLOCK,
+    ) -> None:
+        self._adapter = HTTPAdapter(
+            pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block, max_retries=0
+        )
+        self._session = requests.Session()
+        self._session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        self._session.mount("http://", self._adapter)
+        self._session.mount("https://", self._adapter)
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        """
+        GET ``url`` over a pooled keep-alive connection.
+
+        :param url: Absolute URL.
+        :param kwargs: Passed through to ``requests.Session.get`` (params, headers, timeout, ...).
+        :return: The response.
+        :raises requests.RequestException: On transport errors.
+        """
+        return self._session.get(url, **kwargs)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Per-host pool utilisation.
+
+        :return: Mapping of "scheme://host:port" to maxsize, in_use, idle, connections_opened
+            and requests counts.
+        """
+        pools = self._adapter.poolmanager.pools
+        out = {}
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            queued = list(pool.pool.queue) if pool.pool is not None else []
+            out[f"{key.key_scheme}://{key.key_host}:{key.key_port}"] = {
+                "maxsize": pool.pool.maxsize if pool.pool is not None else 0,
+                "in_use": (pool.pool.maxsize - len(queued)) if pool.pool is not None else 0,
+                "idle": sum(1 for conn in queued if conn is not None),
+                "connections_opened": pool.num_connections,
+                "requests": pool.num_requests,
+            }
+        return out
+
+
+http_client = PooledHttpClient()
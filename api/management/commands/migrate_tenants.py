@@ -0,0 +1,65 @@
+# api/management/commands/migrate_tenants.py
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.tenant_migrations import TENANT_MIGRATE_WORKERS, MigrationOrchestrator
+from api.tenant_prewarm import default_tenants, parse_tenant, prewarm_tenants
+from api.tenant_registry import tenant_registry
+
+
+class Command(BaseCommand):
+    help = "Migrate the 'api' app on tenant databases concurrently, recording schema version and duration per tenant."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "tenants", nargs="*",
+            help='Tenants as client ids, usernames or client keys ("id:42", "username:acme"). '
+                 "Defaults to TENANT_PREWARM_TENANTS, else every tenant in the shared tenant directory.",
+        )
+        parser.add_argument("--from-accounts", action="store_true", help="List tenants from Accounts (TENANT_PREWARM_LIST_PATH).")
+        parser.add_argument("--workers", type=int, default=TENANT_MIGRATE_WORKERS, help="Maximum tenants migrated in parallel.")
+        parser.add_argument(
+            "--sync-template", action="store_true",
+            help="Also bring the template database (TENANT_PROVISION_MODE=template) to the latest migration.",
+        )
+        parser.add_argument("--json", action="store_true", help="Print the job as JSON.")
+
+    def handle(self, *args, **options):
+        try:
+            if options["tenants"]:
+                tenants = [parse_tenant(t) for t in options["tenants"]]
+            else:
+                tenants = default_tenants(from_accounts=options["from_accounts"])
+        except (RuntimeError, ValueError) as e:
+            raise CommandError(str(e))
+
+        with tenant_registry.hold() as hold:
+            resolved = prewarm_tenants(tenants, workers=options["workers"], connect=False, hold=hold)
+            for r in resolved:
+                if not r["ok"]:
+                    self.stderr.write(self.style.ERROR(f"{r['tenant']:<24} FAILED to resolve: {r['error']}"))
+
+            orchestrator = MigrationOrchestrator(workers=options["workers"])
+            job = orchestrator.run(r["alias"] for r in resolved if r["ok"])
+
+            if options["sync_template"]:
+                aliases = [r["alias"] for r in resolved if r["ok"]]
+                if not aliases:
+                    raise CommandError("No tenant resolved; cannot locate the template server")
+                version = orchestrator.sync_template(aliases[0])
+                self.stdout.write(f"Template: {version or 'not synced'}")
+
+        if options["json"]:
+            self.stdout.write(json.dumps(job, indent=2))
+        else:
+            for t in job["tenants"].values():
+                if t["status"] == "succeeded":
+                    self.stdout.write(f"{t['alias']:<24} {t['method']:<8} {t['version']:<40} {t['duration_ms']}ms")
+                else:
+                    self.stderr.write(self.style.ERROR(f"{t['alias']:<24} FAILED: {t['error']}"))
+            ok = sum(1 for t in job["tenants"].values() if t["status"] == "succeeded")
+            self.stdout.write(self.style.SUCCESS(f"Migrated {ok}/{len(resolved)} tenants (job {job['id']})"))
+
+        if job["status"] != "succeeded" or any(not r["ok"] for r in resolved):
+            raise CommandError("Some tenants failed to migrate")
@@ -0,0 +1,48 @@
+# api/management/commands/prewarm_tenants.py
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.tenant_prewarm import TENANT_PREWARM_WORKERS, default_tenants, parse_tenant, prewarm_tenants
+
+
+class Command(BaseCommand):
+    help = "Resolve and register tenant DB aliases and open a first connection to each, reporting per-tenant timings."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "tenants", nargs="*",
+            help='Tenants as client ids, usernames or client keys ("id:42", "username:acme"). '
+                 "Defaults to TENANT_PREWARM_TENANTS, else every tenant in the shared tenant directory.",
+        )
+        parser.add_argument("--from-accounts", action="store_true", help="List tenants from Accounts (TENANT_PREWARM_LIST_PATH).")
+        parser.add_argument("--workers", type=int, default=TENANT_PREWARM_WORKERS, help="Maximum tenants warmed in parallel.")
+        parser.add_argument("--no-connect", action="store_true", help="Only register aliases; do not open connections.")
+        parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+
+    def handle(self, *args, **options):
+        try:
+            if options["tenants"]:
+                tenants = [parse_tenant(t) for t in options["tenants"]]
+            else:
+                tenants = default_tenants(from_accounts=options["from_accounts"])
+        except (RuntimeError, ValueError) as e:
+            raise CommandError(str(e))
+
+        results = prewarm_tenants(tenants, workers=options["workers"], connect=not options["no_connect"])
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+        else:
+            for r in results:
+                if r["ok"]:
+                    self.stdout.write(
+                        f"{r['tenant']:<24} {r['alias']:<24} resolve={r['resolve_ms']}ms connect={r['connect_ms']}ms"
+                    )
+                else:
+                    self.stderr.write(self.style.ERROR(f"{r['tenant']:<24} FAILED: {r['error']}"))
+            ok = sum(1 for r in results if r["ok"])
+            self.stdout.write(self.style.SUCCESS(f"Prewarmed {ok}/{len(results)} tenants"))
+
+        if any(not r["ok"] for r in results):
+            raise CommandError("Some tenants failed to prewarm")
@@ -0,0 +1,59 @@
+# api/management/commands/tenant_schema_drift.py
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.tenant_migrations import TENANT_DRIFT_WORKERS, scan_schema_drift
+from api.tenant_prewarm import default_tenants, parse_tenant, prewarm_tenants
+from api.tenant_registry import tenant_registry
+
+
+class Command(BaseCommand):
+    help = "Report which tenant databases are behind (or ahead of) the code's 'api' migrations."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "tenants", nargs="*",
+            help='Tenants as client ids, usernames or client keys ("id:42", "username:acme"). '
+                 "Defaults to TENANT_PREWARM_TENANTS, else every tenant in the shared tenant directory.",
+        )
+        parser.add_argument("--from-accounts", action="store_true", help="List tenants from Accounts (TENANT_PREWARM_LIST_PATH).")
+        parser.add_argument("--workers", type=int, default=TENANT_DRIFT_WORKERS, help="Maximum databases queried in parallel.")
+        parser.add_argument("--all", action="store_true", help="List current tenants too, not only drifted ones.")
+        parser.add_argument("--json", action="store_true", help="Print the full report as JSON.")
+
+    def handle(self, *args, **options):
+        try:
+            if options["tenants"]:
+                tenants = [parse_tenant(t) for t in options["tenants"]]
+            else:
+                tenants = default_tenants(from_accounts=options["from_accounts"])
+        except (RuntimeError, ValueError) as e:
+            raise CommandError(str(e))
+
+        with tenant_registry.hold() as hold:
+            resolved = prewarm_tenants(tenants, workers=options["workers"], connect=False, hold=hold)
+            report = scan_schema_drift((r["alias"] for r in resolved if r["ok"]), workers=options["workers"])
+        report["unresolved"] = [{"tenant": r["tenant"], "error": r["error"]} for r in resolved if not r["ok"]]
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        for row in report["tenants"]:
+            if row["status"] == "current" and not options["all"]:
+                continue
+            detail = row["error"] or ", ".join(
+                filter(None, [
+                    f"missing {len(row['missing'])} (first {row['missing'][0]})" if row["missing"] else "",
+                    f"unknown {', '.join(row['unknown'])}" if row["unknown"] else "",
+                ])
+            )
+            self.stdout.write(f"{row['alias']:<24} {row['status']:<8} {row['applied'] or '-':<40} {detail}")
+        for r in report["unresolved"]:
+            self.stderr.write(self.style.ERROR(f"{r['tenant']:<24} unresolved: {r['error']}"))
+        self.stdout.write(
+            f"latest={report['latest']} scanned={report['scanned']} current={report['current']} "
+            f"behind={report['behind']} ahead={report['ahead']} error={report['error']} "
+            f"unresolved={len(report['unresolved'])} in {report['duration_ms']}ms"
+        )
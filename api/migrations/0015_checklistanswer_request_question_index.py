@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_fitouttype'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='checklistanswer',
+            index=models.Index(fields=['fitout_request', 'question'], name='api_answer_request_question'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_checklistanswer_request_question_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='checklistanswer',
+            index=models.Index(fields=['created_at', 'id'], name='api_answer_created_id'),
+        ),
+        migrations.AddIndex(
+            model_name='fitoutdeviationchat',
+            index=models.Index(fields=['created_at', 'id'], name='api_devchat_created_id'),
+        ),
+        migrations.AddIndex(
+            model_name='fitoutrequest',
+            index=models.Index(fields=['created_at', 'id'], name='api_request_created_id'),
+        ),
+        migrations.AddIndex(
+            model_name='fitoutrequestchat',
+            index=models.Index(fields=['created_at', 'id'], name='api_reqchat_created_id'),
+        ),
+    ]
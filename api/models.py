@@ -152,6 +152,12 @@ class FitoutRequest(BaseModel):
     description = models.TextField(blank=True, null=True)
     # payment_mode = models.ForeignKey("PaymentMode", on_delete=models.SET_NULL, null=True, blank=True, related_name="fitout_requests")
 
+    class Meta:
+        indexes = [
+            # keyset pagination (newest first)
+            models.Index(fields=["created_at", "id"], name="api_request_created_id"),
+        ]
+
     def approve(self, user_name, description=""):
         approved_status = Status.objects.filter(name__iexact="Approved").first()
         if approved_status:
@@ -245,6 +251,12 @@ class FitoutDeviationChat(BaseModel):
     file = models.FileField(upload_to="deviation_chats/", blank=True, null=True)
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # keyset pagination (newest first)
+            models.Index(fields=["created_at", "id"], name="api_devchat_created_id"),
+        ]
+
     def __str__(self):
         return f"Message by {self.sender_id} on {self.timestamp}"
 
@@ -256,6 +268,12 @@ class FitoutRequestChat(BaseModel):
     file = models.FileField(upload_to="fitout_request_chats/", blank=True, null=True)
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # keyset pagination (newest first)
+            models.Index(fields=["created_at", "id"], name="api_reqchat_created_id"),
+        ]
+
     def __str__(self):
         return f"Message by {self.sender_id} on {self.timestamp}"
     
@@ -357,6 +375,14 @@ class ChecklistAnswer(BaseModel):
     # selected_option = models.ForeignKey(QuestionOption, on_delete=models.SET_NULL, null=True, blank=True)  # for yes/no & MCQ
     photo = models.ImageField(upload_to="checklist_answers/photos/", blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            # "answers for request X", in question order
+            models.Index(fields=["fitout_request", "question"], name="api_answer_request_question"),
+            # keyset pagination (newest first)
+            models.Index(fields=["created_at", "id"], name="api_answer_created_id"),
+        ]
+
     def __str__(self):
         return f"Answer to {self.question} for Request {self.fitout_request_id}"
 
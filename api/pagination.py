@@ -1,6 +1,171 @@
-from rest_framework.pagination import PageNumberPagination
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.core import signing
+from django.core.paginator import InvalidPage, Page, Paginator
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 class StandardResultsSetPagination(PageNumberPagination):
     page_size = 20
     page_size_query_param = 'page_size'
-    max_page_size = 100
\ No newline at end of file
+    max_page_size = 100
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        Async counterpart of ``paginate_queryset`` using the async ORM (``acount`` and async
+        iteration) so the count and page queries do not block the event loop. Page numbers,
+        ``last`` and error responses behave exactly like the sync version.
+        """
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = Paginator(queryset, page_size)
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            number = paginator.validate_number(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+
+        bottom = (number - 1) * page_size
+        objects = [obj async for obj in queryset[bottom:bottom + page_size]]
+        self.page = Page(objects, number, paginator)
+
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        return list(self.page)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset ("cursor") pagination over ``(created_at, id)``, newest first.
+
+    Active when the request carries a ``cursor`` parameter (empty for the first page). Each
+    page is one indexed range query of ``page_size + 1`` rows: no COUNT and no OFFSET, so a
+    deep page costs the same as the first and rows inserted meanwhile neither shift nor
+    duplicate entries. Cursors are opaque signed tokens; ``next``/``previous`` links carry
+    them, and a tampered or malformed cursor is a 404. The keyset order replaces any other
+    ordering of the queryset.
+
+    Without ``cursor`` the request is handled by ``page_pagination_class`` (page numbers),
+    or left unpaginated when that is None, so existing clients keep working.
+    """
+    cursor_query_param = 'cursor'
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('created_at', 'id')  # compared as a tuple, descending
+    invalid_cursor_message = 'Invalid cursor'
+    cursor_salt = 'api.pagination.cursor'
+    page_pagination_class = None
+
+    def __init__(self):
+        self.fallback = self.page_pagination_class() if self.page_pagination_class else None
+        self.keyset = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self._use_keyset(request):
+            return self.fallback.paginate_queryset(queryset, request, view) if self.fallback else None
+        return self._finish(list(self._page_queryset(queryset)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        if not self._use_keyset(request):
+            if self.fallback is None:
+                return None
+            if hasattr(self.fallback, 'apaginate_queryset'):
+                return await self.fallback.apaginate_queryset(queryset, request, view)
+            return await sync_to_async(self.fallback.paginate_queryset)(queryset, request, view)
+        return self._finish([obj async for obj in self._page_queryset(queryset)])
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return self.fallback.get_paginated_response(data)
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self._link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self._link(self.page[0], reverse=True)
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+            if size > 0:
+                return min(size, self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        return self.page_size
+
+    def _use_keyset(self, request):
+        self.request = request
+        self.keyset = self.cursor_query_param in request.query_params
+        return self.keyset
+
+    def _page_queryset(self, queryset):
+        self.limit = self.get_page_size(self.request)
+        self.cursor = self._decode(self.request.query_params.get(self.cursor_query_param))
+        major, minor = self.ordering
+        reverse = bool(self.cursor and self.cursor['r'])
+
+        if self.cursor:
+            value, pk = self.cursor['v'], self.cursor['i']
+            op = 'gt' if reverse else 'lt'
+            queryset = queryset.filter(
+                Q(**{f'{major}__{op}': value}) | Q(**{major: value, f'{minor}__{op}': pk})
+            )
+        order = (major, minor) if reverse else (f'-{major}', f'-{minor}')
+        return queryset.order_by(*order)[:self.limit + 1]
+
+    def _finish(self, rows):
+        reverse = bool(self.cursor and self.cursor['r'])
+        more = len(rows) > self.limit
+        rows = rows[:self.limit]
+        if reverse:
+            rows.reverse()
+            self.has_previous, self.has_next = more, True
+        else:
+            self.has_previous, self.has_next = self.cursor is not None, more
+        self.page = rows
+        if not rows:
+            self.has_next = self.has_previous = False
+        return rows
+
+    def _link(self, obj, reverse):
+        major, minor = self.ordering
+        value = getattr(obj, major)
+        if hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        encoded = signing.dumps({'v': value, 'i': getattr(obj, minor), 'r': reverse}, salt=self.cursor_salt)
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, encoded)
+
+    def _decode(self, encoded):
+        if not encoded:
+            return None
+        try:
+            token = signing.loads(encoded, salt=self.cursor_salt)
+            value, pk, reverse = token['v'], token['i'], token['r']
+            if not isinstance(value, str) or type(pk) is not int or not isinstance(reverse, bool):
+                raise ValueError(token)
+            return {'v': datetime.fromisoformat(value), 'i': pk, 'r': reverse}
+        except (signing.BadSignature, TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+
+class KeysetOrPageNumberPagination(KeysetPagination):
+    """Keyset pages with ``?cursor=``, standard page-number pages otherwise."""
+    page_pagination_class = StandardResultsSetPagination
@@ -1,8 +1,12 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models as dj_models
+from django.db.models import Count, Q, Value
 from rest_framework import serializers
 from .models import FitoutType
 from rest_framework.validators import UniqueTogetherValidator, UniqueValidator
 from .models import (
     Annexure,
+    BaseModel,
     PaymentMode,
     SubCategory,
     WorkCategory,
@@ -29,6 +33,8 @@ class AliasContextMin:
     @property
     def alias(self) -> str:
         alias = self.context.get('alias')
+        if not alias and self.context.get('tenant') is not None:
+            alias = self.context['tenant'].alias
         if not alias:
             raise RuntimeError("Serializer context missing 'alias'.")
         return alias
@@ -52,6 +58,63 @@ class AliasModelSerializer(AliasContextMin, serializers.ModelSerializer):
                     val.queryset = val.queryset.using(self.alias)
 
 
+# ---------------- Related Counts ----------------
+class RelatedCountField(serializers.IntegerField):
+    """
+    Read-only number of objects in a reverse relation, read from a queryset annotation
+    added by ``annotate_related_counts`` instead of a COUNT query per row.
+
+    Instances that were not loaded through an annotated queryset (e.g. just created) fall
+    back to a single count. Relations the model does not have render as null.
+    """
+    def __init__(self, relation: str, **kwargs):
+        self.relation = relation
+        kwargs["source"] = "*"
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        annotated = getattr(instance, self.field_name, _NOT_ANNOTATED)
+        if annotated is not _NOT_ANNOTATED:
+            return annotated
+        if not _has_relation(type(instance), self.relation):
+            return None
+        return getattr(instance, self.relation).count()
+
+
+_NOT_ANNOTATED = object()
+
+
+def _has_relation(model, relation: str) -> bool:
+    try:
+        model._meta.get_field(relation)
+    except FieldDoesNotExist:
+        return False
+    return True
+
+
+def annotate_related_counts(queryset, serializer_class):
+    """
+    Annotate ``queryset`` with every RelatedCountField of ``serializer_class``, as one
+    grouped query. Soft-deleted related rows are not counted, matching the ActiveManager
+    count the field falls back to. Relations missing from the model are annotated as NULL.
+
+    :param queryset: Queryset of the serializer's model (already routed to the tenant DB).
+    :param serializer_class: Serializer declaring RelatedCountField fields.
+    :return: The annotated queryset.
+    """
+    counts = {}
+    for name, field in serializer_class._declared_fields.items():
+        if isinstance(field, RelatedCountField):
+            if _has_relation(queryset.model, field.relation):
+                related = queryset.model._meta.get_field(field.relation).related_model
+                active = Q(**{f"{field.relation}__is_deleted": False}) if issubclass(related, BaseModel) else None
+                counts[name] = Count(field.relation, distinct=True, filter=active)
+            else:
+                counts[name] = Value(None, output_field=dj_models.IntegerField())
+    return queryset.annotate(**counts) if counts else queryset
+
+
 # ---------------- Core Fitout Serializers ----------------
 # class AnnexureImageSerializer(AliasModelSerializer):
 #     class Meta:
@@ -311,7 +374,7 @@ class FitoutDeviationChatSerializer(AliasModelSerializer):
 class FitoutDeviationSerializer(AliasModelSerializer):
     images = FitoutDeviationImageSerializer(many=True, required=False)
     chats = FitoutDeviationChatSerializer(many=True, required=False)
-    status_name = serializers.CharField(source='status.status', read_only=True)
+    status_name = serializers.CharField(source='status.name', read_only=True)
     fitout_request = serializers.PrimaryKeyRelatedField(queryset=FitoutRequest.objects.all())
 
     class Meta:
@@ -330,9 +393,7 @@ class FitoutDeviationSerializer(AliasModelSerializer):
         
         
 class PaymentModeSerializer(serializers.ModelSerializer):
-    fitout_requests_count = serializers.IntegerField(
-        source="fitout_requests.count", read_only=True
-    )
+    fitout_requests_count = RelatedCountField("fitout_requests")
 
     class Meta:
         model = PaymentMode
@@ -389,7 +450,6 @@ class FitoutChecklistSerializer(AliasModelSerializer):
             "status",
             "work_category",
             "sub_category",
-            "associations",
             "questions"
         ]
 
@@ -397,10 +457,12 @@ class FitoutChecklistSerializer(AliasModelSerializer):
 class ChecklistAnswerSerializer(AliasModelSerializer):
     question_text = serializers.CharField(source='question.question_text', read_only=True)
     question_type = serializers.CharField(source='question.answer_type', read_only=True)
-    selected_option_text = serializers.CharField(source='selected_option.option_text', read_only=True)
+    selected_option_text = serializers.CharField(source='question_option.option_text', read_only=True, default=None)
     fitout_request = serializers.PrimaryKeyRelatedField(queryset=FitoutRequest.objects.all())
     question = serializers.PrimaryKeyRelatedField(queryset=ChecklistQuestion.objects.all())
-    selected_option = serializers.PrimaryKeyRelatedField(queryset=QuestionOption.objects.all(), required=False, allow_null=True)
+    selected_option = serializers.PrimaryKeyRelatedField(
+        source='question_option', queryset=QuestionOption.objects.all(), required=False, allow_null=True
+    )
 
     class Meta:
         model = ChecklistAnswer
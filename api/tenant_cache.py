@@ -0,0 +1,179 @@
+# api/tenant_cache.py
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+from django.core.cache import caches
+
+logger = logging.getLogger("asset.tenant_cache")
+
+TENANT_INFO_HARD_TTL = int(os.getenv("TENANT_INFO_HARD_TTL", "86400"))
+TENANT_INFO_LOCAL_MAX = int(os.getenv("TENANT_INFO_LOCAL_MAX", "1024"))
+TENANT_INFO_CACHE_ALIAS = os.getenv("TENANT_INFO_CACHE_ALIAS", "tenants")
+
+
+class TwoTierCache:
+    """
+    In-process LRU in front of a shared Django cache, with stale-while-revalidate.
+
+    Entries are fresh for ``soft_ttl`` seconds. Between ``soft_ttl`` and ``hard_ttl`` they are
+    still returned, and a single background refresh per key replaces them. Only a miss in both
+    tiers (or an entry past ``hard_ttl``) calls ``fetch`` on the caller's thread. Values
+    rejected by ``shareable`` are kept in the in-process tier only.
+    """
+
+    def __init__(
+        self,
+        soft_ttl: int,
+        cache_alias: str = TENANT_INFO_CACHE_ALIAS,
+        hard_ttl: int = TENANT_INFO_HARD_TTL,
+        local_max: int = TENANT_INFO_LOCAL_MAX,
+        shareable: Optional[Callable[[Any], bool]] = None,
+    ) -> None:
+        self.cache_alias = cache_alias
+        self.soft_ttl = soft_ttl
+        self.hard_ttl = max(hard_ttl, soft_ttl)
+        self.local_max = local_max
+        self.shareable = shareable
+        self._lock = threading.Lock()
+        self._local: "OrderedDict[str, Tuple[Any, float, float]]" = OrderedDict()
+        self._refreshing: Set[str] = set()
+        self._counts = {"local_hits": 0, "shared_hits": 0, "misses": 0, "stale_served": 0, "refresh_errors": 0}
+
+    @property
+    def shared(self):
+        return caches[self.cache_alias]
+
+    def get_or_fetch(self, key: str, fetch: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for ``key``, fetching it on a full miss.
+
+        :param key: Cache key.
+        :param fetch: Zero-argument callable producing a fresh value.
+        :return: The cached or freshly fetched value.
+        :raises Exception: Whatever ``fetch`` raised on a full miss.
+        """
+        now = time.time()
+        entry = self._get_local(key, now)
+        if entry is not None:
+            self._count("local_hits")
+        else:
+            entry = self._get_shared(key, now)
+            if entry is not None:
+                self._count("shared_hits")
+                self._set_local(key, entry)
+
+        if entry is None:
+            self._count("misses")
+            value = fetch()
+            self.set(key, value)
+            return value
+
+        value, soft_expires_at, _ = entry
+        if now >= soft_expires_at:
+            self._count("stale_served")
+            self._refresh_in_background(key, fetch)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Store a fresh value in both tiers (the local one only, if it is not shareable).
+
+        :param key: Cache key.
+        :param value: Value to store.
+        """
+        now = time.time()
+        entry = (value, now + self.soft_ttl, now + self.hard_ttl)
+        self._set_local(key, entry)
+        if self.shareable is not None and not self.shareable(value):
+            return
+        try:
+            self.shared.set(
+                key, {"data": value, "soft_expires_at": entry[1], "hard_expires_at": entry[2]}, self.hard_ttl
+            )
+        except Exception:
+            logger.warning("Shared cache set failed for %s", key, exc_info=True)
+
+    def delete(self, key: str) -> None:
+        """
+        Remove a key from both tiers.
+
+        :param key: Cache key.
+        """
+        with self._lock:
+            self._local.pop(key, None)
+        try:
+            self.shared.delete(key)
+        except Exception:
+            logger.warning("Shared cache delete failed for %s", key, exc_info=True)
+
+    def delete_local(self, key: str) -> None:
+        """
+        Remove a key from the in-process tier only, so the next read goes to the shared tier.
+
+        :param key: Cache key.
+        """
+        with self._lock:
+            self._local.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        :return: Hit/miss counters plus local tier size and running refreshes.
+        """
+        with self._lock:
+            return {**self._counts, "local_size": len(self._local), "refreshing": len(self._refreshing)}
+
+    def _get_local(self, key: str, now: float) -> Optional[Tuple[Any, float, float]]:
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return None
+            if now >= entry[2]:
+                del self._local[key]
+                return None
+            self._local.move_to_end(key)
+            return entry
+
+    def _set_local(self, key: str, entry: Tuple[Any, float, float]) -> None:
+        with self._lock:
+            self._local[key] = entry
+            self._local.move_to_end(key)
+            while len(self._local) > self.local_max:
+                self._local.popitem(last=False)
+
+    def _get_shared(self, key: str, now: float) -> Optional[Tuple[Any, float, float]]:
+        try:
+            raw = self.shared.get(key)
+        except Exception:
+            logger.warning("Shared cache get failed for %s", key, exc_info=True)
+            return None
+        if not isinstance(raw, dict) or "soft_expires_at" not in raw:
+            return None
+        if now >= raw["hard_expires_at"]:
+            return None
+        return raw["data"], raw["soft_expires_at"], raw["hard_expires_at"]
+
+    def _refresh_in_background(self, key: str, fetch: Callable[[], Any]) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        threading.Thread(target=self._refresh, args=(key, fetch), name=f"cache-refresh:{key}", daemon=True).start()
+
+    def _refresh(self, key: str, fetch: Callable[[], Any]) -> None:
+        try:
+            self.set(key, fetch())
+        except Exception as e:
+            self._count("refresh_errors")
+            logger.warning("Background refresh of %s failed; serving stale value: %s", key, e)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counts[name] += 1
+
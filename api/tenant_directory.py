@@ -0,0 +1,131 @@
+# api/tenant_directory.py
+import logging
+import os
+import threading
+import time
+from typing import Dict, Tuple
+
+from django.core.cache import caches
+
+logger = logging.getLogger("asset.tenant_directory")
+
+TENANT_DIRECTORY_CACHE_ALIAS = os.getenv("TENANT_DIRECTORY_CACHE_ALIAS", "tenants")
+TENANT_VERSION_CHECK_INTERVAL = int(os.getenv("TENANT_VERSION_CHECK_INTERVAL", "15"))
+
+_INDEX_KEY = "tenant_dir:clients"
+
+
+class SharedTenantDirectory:
+    """
+    Cross-process bookkeeping for tenant aliases, stored in a shared Django cache.
+
+    * Versions: every alias has a version number that ``bump`` increments when its
+      credentials are refreshed. Each process remembers the version it registered and,
+      at most every ``check_interval`` seconds per alias, compares it with the shared one;
+      a newer shared version means the local alias must be re-registered.
+    * Index: the client keys and aliases resolved by any process, for fleet-wide
+      commands. Updates are read-modify-write, so concurrent first registrations in
+      different processes may occasionally drop an entry until it is recorded again.
+    """
+
+    def __init__(
+        self, cache_alias: str = TENANT_DIRECTORY_CACHE_ALIAS, check_interval: int = TENANT_VERSION_CHECK_INTERVAL
+    ) -> None:
+        self.cache_alias = cache_alias
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._local: Dict[str, Tuple[int, float]] = {}
+
+    @property
+    def shared(self):
+        return caches[self.cache_alias]
+
+    def version(self, alias: str) -> int:
+        """
+        :param alias: Database alias.
+        :return: The shared version of the alias's descriptor (0 if never bumped).
+        """
+        try:
+            return int(self.shared.get(f"tenant_dir:version:{alias}", 0))
+        except Exception:
+            logger.warning("Could not read shared version for %s", alias, exc_info=True)
+            return 0
+
+    def bump(self, alias: str) -> int:
+        """
+        Mark every process's registration of ``alias`` as outdated.
+
+        :param alias: Database alias.
+        :return: The new shared version.
+        """
+        key = f"tenant_dir:version:{alias}"
+        try:
+            try:
+                version = self.shared.incr(key)
+            except ValueError:
+                version = 1 if self.shared.add(key, 1, None) else self.shared.incr(key)
+        except Exception:
+            logger.warning("Could not bump shared version for %s", alias, exc_info=True)
+            return self.version(alias)
+        self.mark_registered(alias, version)
+        return version
+
+    def mark_registered(self, alias: str, version: int | None = None) -> None:
+        """
+        Record the shared version this process registered ``alias`` at.
+
+        :param alias: Database alias.
+        :param version: Known version; read from the shared cache when omitted.
+        """
+        if version is None:
+            version = self.version(alias)
+        with self._lock:
+            self._local[alias] = (version, time.monotonic())
+
+    def is_stale(self, alias: str) -> bool:
+        """
+        Whether another process refreshed ``alias`` since this process registered it.
+        Reads the shared cache at most once per ``check_interval`` per alias.
+
+        :param alias: Database alias.
+        :return: True if the local registration is outdated.
+        """
+        with self._lock:
+            local = self._local.get(alias)
+        if local is None:
+            return False
+        version, checked_at = local
+        if time.monotonic() - checked_at < self.check_interval:
+            return False
+        current = self.version(alias)
+        with self._lock:
+            self._local[alias] = (version, time.monotonic())
+        return current > version
+
+    def record_client(self, key: str, alias: str) -> None:
+        """
+        Add a resolved client to the shared index.
+
+        :param key: Client key (see ``tenant_registry.client_key``).
+        :param alias: Database alias the client resolved to.
+        """
+        try:
+            index = self.shared.get(_INDEX_KEY) or {}
+            if index.get(key) != alias:
+                index[key] = alias
+                self.shared.set(_INDEX_KEY, index, None)
+        except Exception:
+            logger.warning("Could not record %s in tenant index", key, exc_info=True)
+
+    def known_clients(self) -> Dict[str, str]:
+        """
+        :return: Mapping of client key to alias for every client any process has resolved.
+        """
+        try:
+            return dict(self.shared.get(_INDEX_KEY) or {})
+        except Exception:
+            logger.warning("Could not read tenant index", exc_info=True)
+            return {}
+
+
+tenant_directory = SharedTenantDirectory()
@@ -0,0 +1,227 @@
+# api/tenant_health.py
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Set
+
+from django.core.cache import caches
+from django.db import connections
+
+from fitout.db_router import is_replica, set_replica_available
+
+from .tenant_registry import tenant_registry
+
+logger = logging.getLogger("asset.tenant_health")
+
+HEALTHY = "healthy"
+DEGRADED = "degraded"
+DOWN = "down"
+
+TENANT_HEALTH_INTERVAL = int(os.getenv("TENANT_HEALTH_INTERVAL", "30"))
+TENANT_HEALTH_DOWN_AFTER = int(os.getenv("TENANT_HEALTH_DOWN_AFTER", "3"))
+TENANT_HEALTH_SLOW_MS = int(os.getenv("TENANT_HEALTH_SLOW_MS", "500"))
+TENANT_HEALTH_WORKERS = int(os.getenv("TENANT_HEALTH_WORKERS", "4"))
+TENANT_REPLICA_MAX_LAG = float(os.getenv("TENANT_REPLICA_MAX_LAG", "5"))
+TENANT_HEALTH_CACHE_ALIAS = os.getenv("TENANT_HEALTH_CACHE_ALIAS", "tenants")
+
+
+class _Health:
+    def __init__(self) -> None:
+        self.state = HEALTHY
+        self.failures = 0
+        self.latency_ms: Optional[float] = None
+        self.error: Optional[str] = None
+        self.checked_at: Optional[float] = None
+        self.lag_s: Optional[float] = None
+
+
+class TenantHealthMonitor:
+    """
+    Background prober for registered tenant databases.
+
+    Every ``interval`` seconds each alias in the tenant registry is probed with a short-lived
+    connection. A successful probe marks the alias healthy, or degraded when it took longer
+    than ``slow_ms``. Failures mark it degraded, then down after ``down_after`` consecutive
+    failures. Down aliases keep being probed and recover on the next successful probe.
+
+    Results are shared through the ``cache_alias`` cache: per interval, the worker that takes
+    an alias's short lease probes it and publishes the result, and every other worker adopts
+    that result instead of connecting itself. If the cache is unavailable, each worker
+    probes on its own.
+
+    Read-replica aliases are probed by measuring replication lag; the router only reads
+    from a replica while its last probe succeeded within ``max_replica_lag`` seconds.
+    """
+
+    def __init__(
+        self,
+        interval: int = TENANT_HEALTH_INTERVAL,
+        down_after: int = TENANT_HEALTH_DOWN_AFTER,
+        slow_ms: int = TENANT_HEALTH_SLOW_MS,
+        workers: int = TENANT_HEALTH_WORKERS,
+        max_replica_lag: float = TENANT_REPLICA_MAX_LAG,
+        cache_alias: str = TENANT_HEALTH_CACHE_ALIAS,
+    ) -> None:
+        self.interval = interval
+        self.cache_alias = cache_alias
+        self.max_replica_lag = max_replica_lag
+        self.down_after = down_after
+        self.slow_ms = slow_ms
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._states: Dict[str, _Health] = {}
+        self._pending: Set[str] = set()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, alias: str) -> None:
+        """
+        Start monitoring (if needed) and schedule a prompt probe for a newly registered alias.
+
+        :param alias: Database alias.
+        """
+        with self._lock:
+            self._pending.add(alias)
+        self.start()
+        self._wake.set()
+
+    def status(self, alias: str) -> Optional[str]:
+        """
+        :param alias: Database alias.
+        :return: "healthy", "degraded", "down", or None if the alias was never probed.
+        """
+        health = self._states.get(alias)
+        return health.state if health else None
+
+    def is_down(self, alias: str) -> bool:
+        """
+        :param alias: Database alias.
+        :return: True if the last probes marked the alias down.
+        """
+        return self.status(alias) == DOWN
+
+    def probe(self, alias: str) -> Optional[str]:
+        """
+        Record a current probe result for one alias: the one another worker published this
+        interval, or a fresh probe made synchronously by this worker.
+
+        :param alias: Database alias.
+        :return: The new state, or None if the alias is not registered.
+        """
+        if alias not in connections.databases:
+            return None
+        key = f"tenant_health:{alias}"
+        result = self._shared_call("get", key)
+        if result is None or time.time() - result["checked_at"] >= self.interval:
+            if self._shared_call("add", f"tenant_health:lease:{alias}", 1, max(1, self.interval // 2)) is not False:
+                result = self._measure(alias, result)
+                self._shared_call("set", key, result, self.interval * 3)
+        if result is None:
+            return self.status(alias)  # another worker is probing it right now
+        return self._apply(alias, result)
+
+    def _shared_call(self, method: str, *args):
+        try:
+            return getattr(caches[self.cache_alias], method)(*args)
+        except Exception:
+            logger.warning("Shared health cache %s failed", method, exc_info=True)
+            return None
+
+    def _measure(self, alias: str, previous: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        from .utils import replica_lag_seconds, test_db_connection
+
+        cfg = connections.databases[alias]
+        started = time.monotonic()
+        lag = None
+        params = dict(name=cfg["NAME"], user=cfg["USER"], password=cfg["PASSWORD"], host=cfg["HOST"], port=str(cfg["PORT"]))
+        if is_replica(alias):
+            lag, err = replica_lag_seconds(**params)
+            ok = lag is not None
+        else:
+            ok, err = test_db_connection(**params)
+        latency_ms = round((time.monotonic() - started) * 1000, 1)
+        failures = 0 if ok else (previous or {}).get("failures", 0) + 1
+        return {"ok": ok, "error": err, "latency_ms": latency_ms, "lag_s": lag, "failures": failures, "checked_at": time.time()}
+
+    def _apply(self, alias: str, result: Dict[str, Any]) -> str:
+        with self._lock:
+            health = self._states.setdefault(alias, _Health())
+            previous = health.state
+            health.checked_at = result["checked_at"]
+            health.latency_ms = result["latency_ms"]
+            health.failures = result["failures"]
+            health.error = result["error"]
+            health.lag_s = result["lag_s"]
+            if result["ok"]:
+                health.state = DEGRADED if result["latency_ms"] > self.slow_ms else HEALTHY
+            else:
+                health.state = DOWN if result["failures"] >= self.down_after else DEGRADED
+            state = health.state
+
+        if is_replica(alias):
+            set_replica_available(
+                alias, result["ok"] and state != DOWN and result["lag_s"] <= self.max_replica_lag
+            )
+        if state != previous:
+            logger.warning(
+                "Tenant DB '%s' is now %s (%s)", alias, state, result["error"] or f"{result['latency_ms']:.0f}ms"
+            )
+        return state
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        :return: Mapping of alias to its last probe result.
+        """
+        with self._lock:
+            return {alias: dict(vars(h)) for alias, h in self._states.items()}
+
+    def start(self) -> None:
+        """Start the monitor thread if it is not already running in this process."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="tenant-health-monitor", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Ask the monitor thread to exit after the current cycle."""
+        self._stop.set()
+        self._wake.set()
+
+    def _run(self) -> None:
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="tenant-health") as pool:
+            next_cycle = 0.0
+            while not self._stop.is_set():
+                if time.monotonic() >= next_cycle:
+                    aliases = tenant_registry.aliases()
+                    next_cycle = time.monotonic() + self.interval
+                    with self._lock:
+                        self._pending.clear()
+                        for alias in [a for a in self._states if a not in aliases]:
+                            del self._states[alias]
+                            set_replica_available(alias, False)
+                else:
+                    with self._lock:
+                        aliases = list(self._pending)
+                        self._pending.clear()
+                for alias, exc in zip(aliases, pool.map(self._safe_probe, aliases)):
+                    if exc is not None:
+                        logger.error("Health probe for '%s' crashed: %s", alias, exc)
+                self._wake.wait(max(0.0, next_cycle - time.monotonic()))
+                self._wake.clear()
+
+    def _safe_probe(self, alias: str) -> Optional[BaseException]:
+        try:
+            self.probe(alias)
+        except Exception as e:
+            return e
+        return None
+
+
+tenant_health = TenantHealthMonitor()
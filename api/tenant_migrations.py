@@ -0,0 +1,338 @@
+# api/tenant_migrations.py
+import fcntl
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.management import call_command
+from django.db import DatabaseError, connections
+from django.db.migrations.recorder import MigrationRecorder
+
+from .tenant_registry import tenant_registry
+from .tenant_template import (
+    CLONED, MIGRATED, TENANT_PROVISION_MODE, latest_migration, migration_names, schema_version, template_provisioner,
+)
+
+logger = logging.getLogger("asset.tenant_migrations")
+
+TENANT_MIGRATE_WORKERS = int(os.getenv("TENANT_MIGRATE_WORKERS", "8"))
+TENANT_MIGRATE_LOCK_TTL = int(os.getenv("TENANT_MIGRATE_LOCK_TTL", "900"))
+TENANT_MIGRATE_JOB_TTL = int(os.getenv("TENANT_MIGRATE_JOB_TTL", "86400"))
+# A running job saves a heartbeat this often; one silent for TENANT_MIGRATE_STALE_AFTER
+# seconds (its worker was recycled or killed) is reported as failed.
+TENANT_MIGRATE_HEARTBEAT = int(os.getenv("TENANT_MIGRATE_HEARTBEAT", "15"))
+TENANT_MIGRATE_STALE_AFTER = int(os.getenv("TENANT_MIGRATE_STALE_AFTER", "120"))
+TENANT_MIGRATE_CACHE_ALIAS = os.getenv("TENANT_MIGRATE_CACHE_ALIAS", "tenants")
+# Lock files used when the shared cache is file-based (its add() is not atomic across processes).
+TENANT_MIGRATE_LOCK_DIR = os.getenv(
+    "TENANT_MIGRATE_LOCK_DIR", os.path.join(settings.STATE_DIR, "tenant_locks")
+)
+TENANT_MIGRATE_APP = "api"
+
+TENANT_DRIFT_WORKERS = int(os.getenv("TENANT_DRIFT_WORKERS", "32"))
+
+PENDING = "pending"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+CURRENT = "current"
+BEHIND = "behind"
+AHEAD = "ahead"
+ERROR = "error"
+
+
+class MigrationOrchestrator:
+    """
+    Runs ``migrate`` for tenant databases on a bounded thread pool, outside the request cycle.
+    With TENANT_PROVISION_MODE=template, new tenant databases are cloned from the template
+    database instead, and a tenant migrated because the template was stale re-syncs it.
+
+    Jobs and per-tenant schema records live in the shared tenant cache, so any worker can
+    answer a job poll. A per-alias lock keeps two processes from migrating one database at
+    the same time: an atomic ``add`` in the shared cache, or an ``flock`` on a file in
+    TENANT_MIGRATE_LOCK_DIR when that cache is file-based, whose ``add`` is not atomic; an alias that is already being migrated is reported as
+    failed for that job rather than waited on. A job holds its aliases against registry
+    eviction while it runs.
+    """
+
+    def __init__(self, workers: int = TENANT_MIGRATE_WORKERS, cache_alias: str = TENANT_MIGRATE_CACHE_ALIAS) -> None:
+        self.workers = workers
+        self.cache_alias = cache_alias
+        self._lock = threading.Lock()
+        self._file_locks: Dict[str, Any] = {}
+
+    @property
+    def shared(self):
+        return caches[self.cache_alias]
+
+    def submit(self, aliases: Iterable[str]) -> str:
+        """
+        Start migrating ``aliases`` in the background.
+
+        :param aliases: Registered database aliases.
+        :return: Job id to poll with ``job``.
+        """
+        job_id = self._create_job(aliases)
+        threading.Thread(target=self._run_job, args=(job_id,), name=f"tenant-migrate-{job_id[:8]}", daemon=True).start()
+        return job_id
+
+    def run(self, aliases: Iterable[str]) -> Dict[str, Any]:
+        """
+        Migrate ``aliases`` and wait for the result.
+
+        :param aliases: Registered database aliases.
+        :return: The finished job.
+        """
+        job_id = self._create_job(aliases)
+        self._run_job(job_id)
+        return self.job(job_id)
+
+    def job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        :param job_id: Id returned by ``submit``.
+        :return: Job status with per-tenant results, or None if unknown or expired. A pending
+            or running job whose heartbeat is older than TENANT_MIGRATE_STALE_AFTER is
+            marked failed.
+        """
+        job = self.shared.get(f"tenant_migrate:job:{job_id}")
+        if (
+            job is not None
+            and job["status"] in (PENDING, RUNNING)
+            and time.time() - job.get("heartbeat_at", job["created_at"]) > TENANT_MIGRATE_STALE_AFTER
+        ):
+            job["status"] = FAILED
+            job["finished_at"] = time.time()
+            for alias, tenant in job["tenants"].items():
+                if tenant["status"] in (PENDING, RUNNING):
+                    job["tenants"][alias] = {**tenant, "status": FAILED, "error": "Job stopped reporting progress"}
+            self.shared.set(f"tenant_migrate:job:{job_id}", job, TENANT_MIGRATE_JOB_TTL)
+        return job
+
+    def schema_record(self, alias: str) -> Optional[Dict[str, Any]]:
+        """
+        :param alias: Database alias.
+        :return: Last recorded migration outcome (version, duration_ms, migrated_at, ok, error).
+        """
+        return self.shared.get(f"tenant_migrate:schema:{alias}")
+
+    def migrate_alias(self, alias: str) -> Dict[str, Any]:
+        """
+        Migrate one tenant database and record its schema version and duration.
+
+        :param alias: Registered database alias.
+        :return: Result with alias, ok, method ("clone" or "migrate"), version, duration_ms and error.
+        """
+        if alias not in connections.databases:
+            return {
+                "alias": alias, "ok": False, "method": None, "version": None, "duration_ms": None,
+                "error": "Alias is not registered (evicted or never resolved)",
+            }
+        if not self._acquire(alias):
+            return {
+                "alias": alias, "ok": False, "method": None, "version": None, "duration_ms": None,
+                "error": "Migration already running",
+            }
+
+        started = time.monotonic()
+        result: Dict[str, Any] = {
+            "alias": alias, "ok": False, "method": MIGRATED, "version": None, "duration_ms": None, "error": None,
+        }
+        try:
+            if TENANT_PROVISION_MODE == "template" and template_provisioner.provision(alias) == CLONED:
+                result["method"] = CLONED
+            else:
+                out = StringIO()
+                call_command("migrate", TENANT_MIGRATE_APP, database=alias, interactive=False, verbosity=1, stdout=out)
+                logger.info("Migrated app '%s' on %s\n%s", TENANT_MIGRATE_APP, alias, out.getvalue())
+            result["version"] = schema_version(alias)
+            result["ok"] = True
+        except Exception as e:
+            result["error"] = str(e)
+            logger.exception("Migration failed on %s", alias)
+        finally:
+            self._release(alias)
+            try:
+                connections[alias].close()
+            except Exception:
+                pass
+
+        result["duration_ms"] = round((time.monotonic() - started) * 1000, 1)
+        self.shared.set(
+            f"tenant_migrate:schema:{alias}", {**result, "migrated_at": time.time()}, None
+        )
+        if TENANT_PROVISION_MODE == "template" and result["ok"] and result["method"] == MIGRATED:
+            self.sync_template(alias)
+        return result
+
+    def sync_template(self, alias: str) -> Optional[str]:
+        """
+        Bring the template database on ``alias``'s server to the latest migration, unless
+        it already is or another process is syncing it.
+
+        :param alias: Any registered tenant alias on the template's server.
+        :return: The template's schema version, or None if skipped or failed.
+        """
+        if template_provisioner.is_current(connections.databases[alias]):
+            return latest_migration()
+        if not self._acquire("_template"):
+            return None
+        try:
+            return template_provisioner.sync(alias)
+        except RuntimeError:
+            logger.warning("Template sync via %s failed", alias, exc_info=True)
+            return None
+        finally:
+            self._release("_template")
+
+    def _acquire(self, name: str) -> bool:
+        if not isinstance(self.shared, FileBasedCache):
+            return self.shared.add(f"tenant_migrate:lock:{name}", 1, TENANT_MIGRATE_LOCK_TTL)
+        os.makedirs(TENANT_MIGRATE_LOCK_DIR, mode=0o700, exist_ok=True)
+        fh = open(os.path.join(TENANT_MIGRATE_LOCK_DIR, f"{name}.lock"), "a")
+        try:
+            fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            fh.close()
+            return False
+        with self._lock:
+            self._file_locks[name] = fh
+        return True
+
+    def _release(self, name: str) -> None:
+        with self._lock:
+            fh = self._file_locks.pop(name, None)
+        if fh is not None:
+            fh.close()  # drops the flock
+        else:
+            self.shared.delete(f"tenant_migrate:lock:{name}")
+
+    def _create_job(self, aliases: Iterable[str]) -> str:
+        job_id = uuid.uuid4().hex
+        aliases = list(dict.fromkeys(aliases))
+        self._save(job_id, {
+            "id": job_id,
+            "status": PENDING,
+            "created_at": time.time(),
+            "finished_at": None,
+            "tenants": {alias: {"alias": alias, "status": PENDING} for alias in aliases},
+        })
+        return job_id
+
+    def _run_job(self, job_id: str) -> None:
+        job = self.job(job_id)
+        job["status"] = RUNNING
+        self._save(job_id, job)
+
+        stop = threading.Event()
+
+        def heartbeat() -> None:
+            while not stop.wait(TENANT_MIGRATE_HEARTBEAT):
+                with self._lock:
+                    self._save(job_id, job)
+
+        threading.Thread(target=heartbeat, name=f"tenant-migrate-beat-{job_id[:8]}", daemon=True).start()
+        try:
+            self._run_tenants(job_id, job)
+        finally:
+            stop.set()
+
+    def _run_tenants(self, job_id: str, job: Dict[str, Any]) -> None:
+        def work(alias: str) -> None:
+            with self._lock:
+                job["tenants"][alias] = {"alias": alias, "status": RUNNING}
+                self._save(job_id, job)
+            result = self.migrate_alias(alias)
+            with self._lock:
+                job["tenants"][alias] = {**result, "status": SUCCEEDED if result["ok"] else FAILED}
+                self._save(job_id, job)
+
+        aliases: List[str] = list(job["tenants"])
+        if aliases:
+            with tenant_registry.hold(aliases), ThreadPoolExecutor(
+                max_workers=max(1, min(self.workers, len(aliases))), thread_name_prefix="tenant-migrate"
+            ) as pool:
+                list(pool.map(work, aliases))
+
+        with self._lock:
+            job["status"] = SUCCEEDED if all(t["status"] == SUCCEEDED for t in job["tenants"].values()) else FAILED
+            job["finished_at"] = time.time()
+            self._save(job_id, job)
+
+    def _save(self, job_id: str, job: Dict[str, Any]) -> None:
+        job["heartbeat_at"] = time.time()
+        self.shared.set(f"tenant_migrate:job:{job_id}", job, TENANT_MIGRATE_JOB_TTL)
+
+
+def _drift_one(alias: str, expected: set) -> Dict[str, Any]:
+    started = time.monotonic()
+    result: Dict[str, Any] = {"alias": alias, "status": None, "applied": None, "missing": [], "unknown": [], "error": None}
+    connection = None
+    try:
+        connection = connections[alias]
+        try:
+            with connection.cursor() as cur:
+                cur.execute("SELECT name FROM django_migrations WHERE app = %s", [TENANT_MIGRATE_APP])
+                applied = {name for (name,) in cur.fetchall()}
+        except DatabaseError:
+            if MigrationRecorder(connection).has_table():
+                raise
+            applied = set()  # never migrated
+        result["applied"] = max(applied) if applied else None
+        result["missing"] = sorted(expected - applied)
+        result["unknown"] = sorted(applied - expected)
+        result["status"] = BEHIND if result["missing"] else AHEAD if result["unknown"] else CURRENT
+    except Exception as e:
+        result["status"] = ERROR
+        result["error"] = str(e)
+    finally:
+        if connection is not None:
+            connection.close()
+    result["ms"] = round((time.monotonic() - started) * 1000, 1)
+    return result
+
+
+def scan_schema_drift(aliases: Iterable[str], *, workers: int = TENANT_DRIFT_WORKERS) -> Dict[str, Any]:
+    """
+    Compare the ``api`` migrations recorded in every tenant database with the code's
+    migration graph. Databases are queried concurrently, one ``django_migrations`` read
+    each over the alias's (pooled, when enabled) connection. The aliases are held against
+    registry eviction for the duration of the scan; one that is already gone is reported
+    with status "error".
+
+    :param aliases: Registered database aliases.
+    :param workers: Maximum databases queried in parallel.
+    :return: Report with the code's latest migration, counts per status and per-tenant
+        rows (status, applied, missing, unknown, ms, error). Status is one of
+        "current", "behind", "ahead" (has migrations the code does not know) or "error".
+    """
+    started = time.monotonic()
+    expected = set(migration_names(TENANT_MIGRATE_APP))
+    aliases = list(dict.fromkeys(aliases))
+    rows: List[Dict[str, Any]] = []
+    if aliases:
+        with tenant_registry.hold(aliases), ThreadPoolExecutor(
+            max_workers=max(1, min(workers, len(aliases))), thread_name_prefix="tenant-drift"
+        ) as pool:
+            rows = list(pool.map(lambda alias: _drift_one(alias, expected), aliases))
+    counts = {status: 0 for status in (CURRENT, BEHIND, AHEAD, ERROR)}
+    for row in rows:
+        counts[row["status"]] += 1
+    return {
+        "latest": max(expected) if expected else None,
+        "scanned": len(rows),
+        **counts,
+        "duration_ms": round((time.monotonic() - started) * 1000, 1),
+        "tenants": rows,
+    }
+
+
+migration_orchestrator = MigrationOrchestrator()
@@ -0,0 +1,167 @@
+# api/tenant_prewarm.py
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.db import connections
+
+from .accounts_client import AccountsUnavailableError, accounts_client
+from .tenant_directory import tenant_directory
+from .tenant_registry import AliasHold
+from .utils import ACCOUNTS_URL, _headers, ensure_alias_for_client
+
+logger = logging.getLogger("asset.tenant_prewarm")
+
+TENANT_PREWARM_ON_START = os.getenv("TENANT_PREWARM_ON_START", "0") == "1"
+TENANT_PREWARM_WORKERS = int(os.getenv("TENANT_PREWARM_WORKERS", "8"))
+TENANT_PREWARM_TENANTS = os.getenv("TENANT_PREWARM_TENANTS", "").strip()
+# Optional Accounts endpoint returning a list of {"client_id": ...} or {"username": ...} objects.
+TENANT_PREWARM_LIST_PATH = os.getenv("TENANT_PREWARM_LIST_PATH", "").strip()
+
+
+def parse_tenant(value: str) -> Dict[str, Any]:
+    """
+    Parse a tenant given on the command line or in TENANT_PREWARM_TENANTS.
+
+    Accepts client keys as recorded by the tenant directory ("id:42", "username:acme"),
+    bare numbers (client ids) and bare usernames.
+
+    :param value: Tenant spec.
+    :return: Keyword arguments for ``ensure_alias_for_client``.
+    """
+    value = value.strip()
+    kind, sep, rest = value.partition(":")
+    if sep and kind == "id":
+        return {"client_id": int(rest)}
+    if sep and kind == "username":
+        return {"client_username": rest}
+    if value.isdigit():
+        return {"client_id": int(value)}
+    return {"client_username": value}
+
+
+def list_tenants_from_accounts() -> List[Dict[str, Any]]:
+    """
+    Bulk tenant listing from Accounts (TENANT_PREWARM_LIST_PATH).
+
+    :return: ``ensure_alias_for_client`` keyword arguments per tenant.
+    :raises RuntimeError: If the listing is not configured, unavailable or malformed.
+    """
+    if not TENANT_PREWARM_LIST_PATH:
+        raise RuntimeError("TENANT_PREWARM_LIST_PATH not configured")
+    try:
+        resp = accounts_client.get(f"{ACCOUNTS_URL}/{TENANT_PREWARM_LIST_PATH.lstrip('/')}", headers=_headers())
+    except AccountsUnavailableError as e:
+        raise RuntimeError(f"Tenant listing unavailable: {e}")
+    if resp.status_code != 200:
+        raise RuntimeError(f"Accounts error {resp.status_code} listing tenants")
+    try:
+        rows = resp.json()
+    except ValueError:
+        raise RuntimeError("Accounts returned non-JSON tenant listing")
+    if isinstance(rows, dict):
+        rows = rows.get("results", [])
+
+    tenants = []
+    for row in rows:
+        if row.get("client_id"):
+            tenants.append({"client_id": int(row["client_id"])})
+        elif row.get("username"):
+            tenants.append({"client_username": str(row["username"])})
+    return tenants
+
+
+def default_tenants(from_accounts: bool = False) -> List[Dict[str, Any]]:
+    """
+    Tenants to prewarm when none are given explicitly: TENANT_PREWARM_TENANTS
+    (comma-separated), else the Accounts listing if requested, else every client
+    recorded in the shared tenant directory.
+
+    :param from_accounts: Use the Accounts bulk listing instead of the directory.
+    :return: ``ensure_alias_for_client`` keyword arguments per tenant.
+    """
+    if TENANT_PREWARM_TENANTS:
+        return [parse_tenant(v) for v in TENANT_PREWARM_TENANTS.split(",") if v.strip()]
+    if from_accounts:
+        return list_tenants_from_accounts()
+    return [parse_tenant(key) for key in tenant_directory.known_clients()]
+
+
+def _prewarm_one(tenant: Dict[str, Any], connect: bool, hold: Optional[AliasHold]) -> Dict[str, Any]:
+    label = tenant.get("client_id") or tenant.get("client_username")
+    result: Dict[str, Any] = {"tenant": str(label), "alias": None, "ok": False, "resolve_ms": None, "connect_ms": None, "error": None}
+    started = time.monotonic()
+    try:
+        alias = ensure_alias_for_client(**tenant)
+        if hold is not None and not hold.add(alias):
+            # Evicted by concurrent registrations before it could be held; resolve again.
+            alias = ensure_alias_for_client(**tenant)
+            if not hold.add(alias):
+                raise RuntimeError(f"Alias {alias} was evicted before it could be held")
+        result["alias"] = alias
+        result["resolve_ms"] = round((time.monotonic() - started) * 1000, 1)
+        if connect:
+            started = time.monotonic()
+            connection = connections[alias]
+            try:
+                connection.ensure_connection()
+            finally:
+                # Pooled aliases return the connection to the pool, where it stays open.
+                connection.close()
+            result["connect_ms"] = round((time.monotonic() - started) * 1000, 1)
+        result["ok"] = True
+    except Exception as e:
+        result["error"] = str(e)
+        logger.warning("Prewarm failed for tenant %s: %s", label, e)
+    return result
+
+
+def prewarm_tenants(
+    tenants: Iterable[Dict[str, Any]], *, workers: int = TENANT_PREWARM_WORKERS, connect: bool = True,
+    hold: Optional[AliasHold] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Resolve and register tenant aliases concurrently and open a first connection to each.
+
+    At most ``workers`` tenants are warmed at once so a deploy does not stampede
+    Accounts or the tenant databases.
+
+    :param tenants: ``ensure_alias_for_client`` keyword arguments per tenant.
+    :param workers: Maximum parallelism.
+    :param connect: Also open (and release) a first database connection.
+    :param hold: Add every resolved alias to this hold, so resolving more tenants than
+        TENANT_MAX_ALIASES does not evict the ones resolved first.
+    :return: Per-tenant results with alias, ok, resolve_ms, connect_ms and error.
+    """
+    tenants = list(tenants)
+    if not tenants:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(tenants))), thread_name_prefix="tenant-prewarm") as pool:
+        return list(pool.map(lambda t: _prewarm_one(t, connect, hold), tenants))
+
+
+def prewarm_worker(from_accounts: bool = False) -> Optional[List[Dict[str, Any]]]:
+    """
+    Post-fork hook: prewarm the default tenants in a freshly started worker process.
+
+    Does nothing unless TENANT_PREWARM_ON_START=1. Never raises, so a failing tenant
+    cannot stop the worker from booting.
+
+    :param from_accounts: Use the Accounts bulk listing instead of the directory.
+    :return: Per-tenant results, or None when disabled or the tenant list is unavailable.
+    """
+    if not TENANT_PREWARM_ON_START:
+        return None
+    started = time.monotonic()
+    try:
+        results = prewarm_tenants(default_tenants(from_accounts=from_accounts))
+    except Exception:
+        logger.warning("Tenant prewarm skipped", exc_info=True)
+        return None
+    logger.info(
+        "Prewarmed %s/%s tenants in %.1f ms",
+        sum(1 for r in results if r["ok"]), len(results), (time.monotonic() - started) * 1000,
+    )
+    return results
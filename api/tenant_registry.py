@@ -0,0 +1,388 @@
+# api/tenant_registry.py
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from fitout.db_router import set_replicas
+
+logger = logging.getLogger("asset.tenant_registry")
+
+# Maximum number of live tenant aliases per process; 0 disables the cap.
+TENANT_MAX_ALIASES = int(os.getenv("TENANT_MAX_ALIASES", "256"))
+# Ceiling on the summed pool max_size of all pooled tenant aliases; 0 disables the cap.
+TENANT_POOL_GLOBAL_MAX = int(os.getenv("TENANT_POOL_GLOBAL_MAX", "0"))
+
+
+class _Flight:
+    """A single in-flight alias resolution that concurrent callers wait on."""
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.alias: Optional[str] = None
+        self.error: Optional[BaseException] = None
+
+
+class TenantRegistry:
+    """
+    Process-wide registry of tenant database aliases.
+
+    Concurrent ``ensure`` calls for the same client key are coalesced into a single
+    resolution; the other callers block until it finishes and share its result or error.
+    Aliases are published to ``settings.DATABASES`` / ``connections.databases`` only once
+    their configuration is complete.
+
+    Live aliases are kept in LRU order. Publishing beyond ``max_aliases``, or beyond
+    ``max_pool_connections`` pooled connection slots, evicts the least recently used
+    aliases; the next request for an evicted client re-registers it lazily. Aliases in
+    an active ``hold`` are skipped, so the registry may run over capacity until the
+    hold is released. Read replicas are published with their primary and are never
+    evicted on their own; evicting or unregistering a primary drops its replicas too.
+    """
+
+    def __init__(
+        self, max_aliases: int = TENANT_MAX_ALIASES, max_pool_connections: int = TENANT_POOL_GLOBAL_MAX
+    ) -> None:
+        self.max_aliases = max_aliases
+        self.max_pool_connections = max_pool_connections
+        self._lock = threading.RLock()
+        self._clients: Dict[str, str] = {}
+        self._aliases: "OrderedDict[str, int]" = OrderedDict()
+        self._pool_slots = 0
+        self._inflight: Dict[str, _Flight] = {}
+        self._held: Dict[str, int] = {}
+        self._primaries: Dict[str, str] = {}  # replica alias -> primary alias
+        self._opened = threading.local()
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._evictions = 0
+
+    def lookup(self, key: str) -> Optional[str]:
+        """
+        Return the alias registered for a client key, if it is live.
+
+        :param key: Client key (see :func:`client_key`).
+        :return: The alias, or None when the client has no live alias.
+        """
+        alias = self._clients.get(key)
+        if alias is None:
+            return None
+        with self._lock:
+            if alias in self._aliases:
+                self._aliases.move_to_end(alias)
+                return alias
+        # Aliases configured outside the registry are never evicted, only looked up.
+        if alias in connections.databases:
+            return alias
+        return None
+
+    def aliases(self) -> List[str]:
+        """
+        :return: Live registry-managed aliases, least recently used first.
+        """
+        with self._lock:
+            return list(self._aliases)
+
+    def ensure(self, key: str, resolve: Callable[[], str]) -> str:
+        """
+        Return the alias for a client key, resolving it at most once concurrently.
+
+        :param key: Client key (see :func:`client_key`).
+        :param resolve: Callable that registers the alias and returns it.
+        :return: The registered alias.
+        :raises Exception: Whatever ``resolve`` raised, for the leader and every waiter.
+        """
+        alias = self.lookup(key)
+        if alias is not None:
+            self._hits += 1
+            return alias
+
+        with self._lock:
+            alias = self.lookup(key)
+            if alias is not None:
+                self._hits += 1
+                return alias
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._inflight[key] = flight
+                self._misses += 1
+            else:
+                self._coalesced += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.alias
+
+        try:
+            alias = resolve()
+            with self._lock:
+                self._clients[key] = alias
+            flight.alias = alias
+            return alias
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.event.set()
+
+    def publish(self, alias: str, cfg: Dict[str, Any], primary: Optional[str] = None) -> None:
+        """
+        Atomically make a fully built alias configuration visible to Django.
+
+        Evicts least recently used aliases when the registry is over capacity.
+
+        :param alias: Database alias.
+        :param cfg: Complete Django ``DATABASES`` entry.
+        :param primary: Primary alias when ``alias`` is one of its read replicas.
+        :raises RuntimeError: If the alias's pool alone exceeds the global connection ceiling.
+        """
+        slots = _pool_max_size(cfg)
+        if self.max_pool_connections and slots > self.max_pool_connections:
+            raise RuntimeError(
+                f"Pool max_size {slots} for '{alias}' exceeds TENANT_POOL_GLOBAL_MAX={self.max_pool_connections}"
+            )
+
+        with self._lock:
+            self._pool_slots -= self._aliases.pop(alias, 0)
+            evicted = self._evict_locked(1, slots)
+            settings.DATABASES[alias] = cfg
+            connections.databases[alias] = cfg
+            self._aliases[alias] = slots
+            self._pool_slots += slots
+            if primary:
+                self._primaries[alias] = primary
+        self._close_evicted(evicted)
+
+    def hold(self, aliases: Iterable[str] = ()) -> "AliasHold":
+        """
+        Protect aliases from LRU eviction until the returned hold is released, e.g. for
+        a fleet-wide scan that resolves more tenants than ``max_aliases``.
+
+        :param aliases: Aliases to hold right away; more can be added with ``AliasHold.add``.
+        :return: Hold, usable as a context manager.
+        """
+        hold = AliasHold(self)
+        for alias in aliases:
+            hold.add(alias)
+        return hold
+
+    def unregister(self, alias: str) -> None:
+        """
+        Close the calling thread's connection and remove the alias and its client keys,
+        together with the alias's read replicas.
+
+        :param alias: Database alias.
+        """
+        with self._lock:
+            removed = self._remove_locked(alias)
+        for old in removed:
+            self._close_local(old)
+            _close_pool(old)
+            logger.info("Unregistered DB alias '%s'", old)
+
+    def release_stale_connections(self) -> None:
+        """
+        Close the calling thread's connections to aliases that are no longer registered.
+
+        Django keeps connections per thread, so an eviction can only close the evicting
+        thread's connection directly; every other thread releases its own at request end.
+        """
+        opened = getattr(self._opened, "aliases", None)
+        if not opened:
+            return
+        for alias in [a for a in opened if a not in connections.databases]:
+            opened.discard(alias)
+            self._close_local(alias)
+
+    def _track_connection(self, sender, connection, **kwargs) -> None:
+        if connection.alias in self._aliases:
+            if not hasattr(self._opened, "aliases"):
+                self._opened.aliases = set()
+            self._opened.aliases.add(connection.alias)
+
+    def _pin(self, hold: "AliasHold", alias: str) -> bool:
+        with self._lock:
+            if alias not in connections.databases:
+                return False
+            if alias not in hold.aliases:
+                hold.aliases.add(alias)
+                self._held[alias] = self._held.get(alias, 0) + 1
+            return True
+
+    def _unpin(self, hold: "AliasHold") -> None:
+        with self._lock:
+            for alias in hold.aliases:
+                count = self._held.pop(alias, 1) - 1
+                if count:
+                    self._held[alias] = count
+            hold.aliases.clear()
+            evicted = self._evict_locked(0, 0)
+        self._close_evicted(evicted)
+
+    def _evict_locked(self, incoming: int, slots: int) -> List[str]:
+        evicted: List[str] = []
+        for old in list(self._aliases):
+            if old not in self._aliases:
+                continue  # a replica dropped with its primary
+            if not (
+                (self.max_aliases and len(self._aliases) + incoming > self.max_aliases)
+                or (self.max_pool_connections and self._pool_slots + slots > self.max_pool_connections)
+            ):
+                break
+            if old in self._held or old in self._primaries:
+                continue
+            removed = self._remove_locked(old)
+            self._evictions += len(removed)
+            evicted += removed
+        return evicted
+
+    def _remove_locked(self, alias: str) -> List[str]:
+        removed = [alias] + [r for r, p in self._primaries.items() if p == alias]
+        for old in removed:
+            self._pool_slots -= self._aliases.pop(old, 0)
+            self._primaries.pop(old, None)
+            self._drop_locked(old)
+        if len(removed) > 1:
+            set_replicas(alias, ())
+        return removed
+
+    def _close_evicted(self, evicted: List[str]) -> None:
+        for old in evicted:
+            self._close_local(old)
+            _close_pool(old)
+            logger.info("Evicted least recently used DB alias '%s'", old)
+
+    def _drop_locked(self, alias: str) -> None:
+        settings.DATABASES.pop(alias, None)
+        connections.databases.pop(alias, None)
+        for key in [k for k, a in self._clients.items() if a == alias]:
+            del self._clients[key]
+
+    def _close_local(self, alias: str) -> None:
+        conn = getattr(connections._connections, alias, None)
+        if conn is None:
+            return
+        try:
+            conn.close()
+        except Exception:
+            pass
+        try:
+            delattr(connections._connections, alias)
+        except AttributeError:
+            pass
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Snapshot of registry counters.
+
+        :return: Mapping with hits, misses, coalesced, in_flight, registered, held, evictions,
+            max_aliases, pool_slots and max_pool_connections.
+        """
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "coalesced": self._coalesced,
+                "in_flight": len(self._inflight),
+                "registered": len(self._aliases),
+                "held": len(self._held),
+                "evictions": self._evictions,
+                "max_aliases": self.max_aliases,
+                "pool_slots": self._pool_slots,
+                "max_pool_connections": self.max_pool_connections,
+            }
+
+    def pool_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Per-alias psycopg pool statistics for pooled tenant aliases that have opened a pool.
+
+        :return: Mapping of alias to ``ConnectionPool.get_stats()`` output.
+        """
+        pools = _connection_pools()
+        with self._lock:
+            aliases = [a for a, slots in self._aliases.items() if slots]
+        return {a: pools[a].get_stats() for a in aliases if a in pools}
+
+
+class AliasHold:
+    """Aliases protected from eviction until ``release`` (see ``TenantRegistry.hold``)."""
+
+    def __init__(self, registry: TenantRegistry) -> None:
+        self.registry = registry
+        self.aliases: Set[str] = set()
+
+    def add(self, alias: str) -> bool:
+        """
+        :param alias: Database alias.
+        :return: False if the alias is no longer registered (already evicted).
+        """
+        return self.registry._pin(self, alias)
+
+    def release(self) -> None:
+        """Release every held alias and evict down to capacity again."""
+        self.registry._unpin(self)
+
+    def __enter__(self) -> "AliasHold":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+def _pool_max_size(cfg: Dict[str, Any]) -> int:
+    pool = (cfg.get("OPTIONS") or {}).get("pool")
+    if not pool:
+        return 0
+    return int(pool.get("max_size") or pool.get("min_size") or 1) if isinstance(pool, dict) else 1
+
+
+def _connection_pools() -> Dict[str, Any]:
+    try:
+        from django.db.backends.postgresql.base import DatabaseWrapper
+    except Exception:
+        return {}
+    return DatabaseWrapper._connection_pools
+
+
+def _close_pool(alias: str) -> None:
+    pool = _connection_pools().pop(alias, None)
+    if pool is None:
+        return
+    try:
+        pool.close()
+    except Exception:
+        logger.warning("Closing pool for DB alias '%s' failed", alias, exc_info=True)
+
+
+def client_key(*, client_id: Optional[int] = None, client_username: Optional[str] = None) -> str:
+    """
+    Build the registry key for a client.
+
+    :param client_id: Numeric client identifier.
+    :param client_username: Username uniquely identifying the client.
+    :return: Key such as "id:1845" or "username:acme".
+    """
+    return f"id:{client_id}" if client_id else f"username:{client_username}"
+
+
+tenant_registry = TenantRegistry()
+
+connection_created.connect(tenant_registry._track_connection, dispatch_uid="tenant_registry_track")
+request_finished.connect(
+    lambda sender, **kwargs: tenant_registry.release_stale_connections(),
+    dispatch_uid="tenant_registry_release",
+    weak=False,
+)
@@ -1,13 +1,38 @@
 # api/tenant_state.py
-import threading
-_local = threading.local()
+from fitout.db_router import get_current_tenant, set_current_tenant, _current_tenant
 
+
+class TenantContext:
+    """
+    Tenant resolved for one request. Built once during authentication and attached to the
+    request as ``request.tenant_context`` so views, mixins and serializers reuse it.
+    """
+    __slots__ = ("alias", "client_id", "client_username", "user_id", "username", "resolve_ms")
+
+    def __init__(self, alias, client_id=None, client_username=None, user_id=None, username=None, resolve_ms=0.0):
+        self.alias = alias
+        self.client_id = client_id
+        self.client_username = client_username
+        self.user_id = user_id
+        self.username = username
+        self.resolve_ms = resolve_ms
+
+    def as_dict(self) -> dict:
+        return {
+            "alias": self.alias,
+            "client_username": self.client_username,
+            "client_id": self.client_id,
+            "user_id": self.user_id,
+            "username": self.username,
+        }
+
+
+# Kept for older callers; these read and write the same ContextVar as fitout.db_router.
 def set_current_db_alias(alias: str | None):
-    _local.db_alias = alias
+    return set_current_tenant(alias)
 
 def get_current_db_alias() -> str | None:
-    return getattr(_local, "db_alias", None)
+    return get_current_tenant()
 
 def clear_current_db_alias():
-    if hasattr(_local, "db_alias"):
-        delattr(_local, "db_alias")
\ No newline at end of file
+    _current_tenant.set(None)
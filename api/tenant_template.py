@@ -0,0 +1,232 @@
+# api/tenant_template.py
+import logging
+import os
+import re
+import threading
+import time
+from io import StringIO
+from typing import Any, Dict, List, Optional
+
+import psycopg2
+from psycopg2 import sql
+from django.core.management import call_command
+from django.db import connections
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.recorder import MigrationRecorder
+
+from .tenant_registry import _close_pool
+
+logger = logging.getLogger("asset.tenant_template")
+
+# "template" clones new tenant databases from a migrated template; "migrate" replays migrations.
+TENANT_PROVISION_MODE = os.getenv("TENANT_PROVISION_MODE", "migrate").strip().lower()
+TENANT_TEMPLATE_DB = os.getenv("TENANT_TEMPLATE_DB", "fitout_tenant_template").strip()
+TENANT_TEMPLATE_MAINTENANCE_DB = os.getenv("TENANT_TEMPLATE_MAINTENANCE_DB", "postgres").strip()
+# Dedicated role that owns the template and creates tenant databases; required in template
+# mode. Needs CREATEDB and membership in every tenant role it hands databases over to.
+TENANT_TEMPLATE_DB_USER = os.getenv("TENANT_TEMPLATE_DB_USER", "").strip()
+TENANT_TEMPLATE_DB_PASSWORD = os.getenv("TENANT_TEMPLATE_DB_PASSWORD", "").strip()
+# Also replace tenant databases that exist but contain no relations at all.
+TENANT_TEMPLATE_REPLACE_EMPTY = os.getenv("TENANT_TEMPLATE_REPLACE_EMPTY", "0") == "1"
+TENANT_TEMPLATE_APP = "api"
+
+CLONED = "clone"
+MIGRATED = "migrate"
+
+
+def migration_names(app_label: str = TENANT_TEMPLATE_APP) -> List[str]:
+    """
+    :param app_label: App label.
+    :return: Names of every migration of ``app_label`` on disk.
+    """
+    return [name for app, name in MigrationLoader(None, ignore_no_migrations=True).graph.nodes if app == app_label]
+
+
+def latest_migration(app_label: str = TENANT_TEMPLATE_APP) -> Optional[str]:
+    """
+    :param app_label: App label.
+    :return: Name of the newest migration of ``app_label`` on disk, or None.
+    """
+    leaves = [name for app, name in MigrationLoader(None, ignore_no_migrations=True).graph.leaf_nodes() if app == app_label]
+    return max(leaves) if leaves else None
+
+
+def schema_version(alias: str, app_label: str = TENANT_TEMPLATE_APP) -> Optional[str]:
+    """
+    :param alias: Database alias.
+    :param app_label: App whose migrations are inspected.
+    :return: Name of the latest applied migration of ``app_label`` on ``alias``, or None.
+    """
+    applied = [name for app, name in MigrationRecorder(connections[alias]).applied_migrations() if app == app_label]
+    return max(applied) if applied else None
+
+
+class TemplateProvisioner:
+    """
+    Creates tenant databases by cloning a migrated template (``CREATE DATABASE ... TEMPLATE``).
+
+    One template database is kept per tenant database server and brought to the latest
+    migration by ``sync``. ``provision`` clones it only for a tenant database that does not
+    exist yet (or, with TENANT_TEMPLATE_REPLACE_EMPTY, exists with no relations); in every
+    other case, or when the template is stale or the clone fails, the caller falls back to
+    ``migrate``. The template is owned by the dedicated TENANT_TEMPLATE_DB_USER role, never
+    by whichever tenant role happened to sync it first; after a clone, every relation not
+    owned by the tenant's role is handed over to it.
+    """
+
+    def __init__(self, template_db: str = TENANT_TEMPLATE_DB) -> None:
+        self.template_db = template_db
+        self._lock = threading.Lock()
+
+    def provision(self, alias: str) -> Optional[str]:
+        """
+        Clone the template into ``alias``'s database if possible.
+
+        :param alias: Registered tenant alias whose database should be created.
+        :return: ``CLONED`` if the database was cloned, None if the caller should migrate.
+        :raises RuntimeError: If TENANT_TEMPLATE_DB_USER is not configured.
+        """
+        cfg = connections.databases[alias]
+        self._credentials(cfg)
+        if not self.is_current(cfg):
+            logger.info("Template for %s is stale; migrating instead of cloning", alias)
+            return None
+
+        with self._lock, self._admin(cfg) as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1 FROM pg_database WHERE datname = %s", [cfg["NAME"]])
+                exists = cur.fetchone() is not None
+            if exists and not (TENANT_TEMPLATE_REPLACE_EMPTY and self._is_empty(cfg)):
+                return None
+
+            started = time.monotonic()
+            try:
+                self._release(alias)
+                with conn.cursor() as cur:
+                    if exists:
+                        cur.execute(sql.SQL("DROP DATABASE {}").format(sql.Identifier(cfg["NAME"])))
+                    cur.execute(
+                        sql.SQL("CREATE DATABASE {} TEMPLATE {} OWNER {}").format(
+                            sql.Identifier(cfg["NAME"]), sql.Identifier(self.template_db), sql.Identifier(cfg["USER"])
+                        )
+                    )
+            except psycopg2.Error as e:
+                logger.warning("Cloning template into %s failed: %s", alias, e)
+                return None
+
+        self._hand_over(cfg)
+        logger.info("Cloned template into %s in %.1f ms", alias, (time.monotonic() - started) * 1000)
+        return CLONED
+
+    def sync(self, alias: str) -> Optional[str]:
+        """
+        Create the template on ``alias``'s server if missing and migrate it to the latest migration.
+
+        :param alias: Any registered tenant alias on the server that holds the template.
+        :return: The template's schema version.
+        :raises RuntimeError: If TENANT_TEMPLATE_DB_USER is not configured, or the template
+            cannot be created or migrated.
+        """
+        cfg = connections.databases[alias]
+        self._credentials(cfg)
+        with self._lock:
+            try:
+                with self._admin(cfg) as conn, conn.cursor() as cur:
+                    cur.execute("SELECT 1 FROM pg_database WHERE datname = %s", [self.template_db])
+                    if cur.fetchone() is None:
+                        cur.execute(sql.SQL("CREATE DATABASE {}").format(sql.Identifier(self.template_db)))
+            except psycopg2.Error as e:
+                raise RuntimeError(f"Could not create template database: {e}")
+
+            template_alias = self._template_alias(cfg)
+            try:
+                out = StringIO()
+                call_command("migrate", TENANT_TEMPLATE_APP, database=template_alias, interactive=False, verbosity=1, stdout=out)
+                logger.info("Synced template %s\n%s", self.template_db, out.getvalue())
+                return schema_version(template_alias)
+            except Exception as e:
+                raise RuntimeError(f"Could not migrate template database: {e}")
+            finally:
+                # CREATE DATABASE ... TEMPLATE fails while anyone is connected to the template.
+                connections[template_alias].close()
+
+    def is_current(self, cfg: Dict[str, Any]) -> bool:
+        """
+        :param cfg: Tenant database settings (the template lives on the same server).
+        :return: True if the template exists and is at the latest migration.
+        """
+        template_alias = self._template_alias(cfg)
+        try:
+            return schema_version(template_alias) == latest_migration()
+        except Exception:
+            return False
+        finally:
+            connections[template_alias].close()
+
+    def _template_alias(self, cfg: Dict[str, Any]) -> str:
+        # One template per server: two servers on the same port must not share an alias.
+        server = re.sub(r"\W", "_", f"{cfg['HOST']}_{cfg['PORT']}")
+        alias = f"_template_{server}"
+        if alias not in connections.databases:
+            template_cfg = {**cfg, "NAME": self.template_db, "CONN_MAX_AGE": 0, "CONN_HEALTH_CHECKS": False}
+            template_cfg["OPTIONS"] = {k: v for k, v in cfg.get("OPTIONS", {}).items() if k != "pool"}
+            template_cfg.update(self._credentials(cfg))
+            connections.databases[alias] = template_cfg
+        return alias
+
+    def _credentials(self, cfg: Dict[str, Any]) -> Dict[str, str]:
+        # With a tenant's own role the template would belong to the first tenant to sync it,
+        # and every other tenant role could neither clone it nor own the cloned tables.
+        if not TENANT_TEMPLATE_DB_USER:
+            raise RuntimeError("TENANT_PROVISION_MODE=template requires TENANT_TEMPLATE_DB_USER (a dedicated CREATEDB role)")
+        return {"USER": TENANT_TEMPLATE_DB_USER, "PASSWORD": TENANT_TEMPLATE_DB_PASSWORD}
+
+    def _admin(self, cfg: Dict[str, Any], dbname: str = TENANT_TEMPLATE_MAINTENANCE_DB):
+        creds = self._credentials(cfg)
+        conn = psycopg2.connect(
+            dbname=dbname, user=creds["USER"], password=creds["PASSWORD"], host=cfg["HOST"], port=cfg["PORT"],
+            connect_timeout=cfg.get("OPTIONS", {}).get("connect_timeout", 5),
+        )
+        conn.autocommit = True
+        return _Closing(conn)
+
+    def _is_empty(self, cfg: Dict[str, Any]) -> bool:
+        with self._admin(cfg, dbname=cfg["NAME"]) as conn, conn.cursor() as cur:
+            cur.execute(
+                "SELECT count(*) FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+                "WHERE n.nspname NOT IN ('pg_catalog', 'information_schema') AND n.nspname NOT LIKE 'pg_toast%%'"
+            )
+            return cur.fetchone()[0] == 0
+
+    def _hand_over(self, cfg: Dict[str, Any]) -> None:
+        with self._admin(cfg, dbname=cfg["NAME"]) as conn, conn.cursor() as cur:
+            cur.execute(
+                "SELECT c.relname FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+                "WHERE n.nspname = 'public' AND c.relkind IN ('r', 'S', 'v', 'm', 'p') "
+                "AND pg_get_userbyid(c.relowner) <> %s",
+                [cfg["USER"]],
+            )
+            for (relname,) in cur.fetchall():
+                cur.execute(
+                    sql.SQL("ALTER TABLE {} OWNER TO {}").format(sql.Identifier("public", relname), sql.Identifier(cfg["USER"]))
+                )
+
+    def _release(self, alias: str) -> None:
+        connections[alias].close()
+        _close_pool(alias)
+
+
+class _Closing:
+    """Context manager closing a psycopg2 connection (psycopg2's own only ends the transaction)."""
+
+    def __init__(self, conn) -> None:
+        self.conn = conn
+
+    def __enter__(self):
+        return self.conn
+
+    def __exit__(self, *exc) -> None:
+        self.conn.close()
+
+
+template_provisioner = TemplateProvisioner()
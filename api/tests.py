@@ -1,3 +1,627 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser
+from django.core import signing
+from django.core.cache import caches
+from django.db import connections
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from rest_framework import serializers
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from fitout.auth import VerifiedTokenCache
+from fitout.db_router import MultiTenantRouter, set_replica_available, set_replicas
+from fitout.middleware import TenantMiddleware
+
+from .accounts_client import AccountsClient, AccountsUnavailableError, CircuitBreaker, LastKnownGoodStore
+from .models import (
+    ChecklistAnswer, ChecklistQuestion, DeviationStatus, FitoutChecklist, FitoutDeviation, FitoutDeviationChat, FitoutDeviationImage,
+    FitoutRequest, QuestionOption,
+)
+from .tenant_health import DEGRADED, DOWN, HEALTHY, TenantHealthMonitor
+from .serializers import RelatedCountField, annotate_related_counts
+from .utils import NameResolver, fetch_client_db_info, resolve_names
+from .tenant_registry import TenantRegistry
+from .tenant_migrations import FAILED, SUCCEEDED, TENANT_MIGRATE_STALE_AFTER, MigrationOrchestrator
+from .tenant_template import CLONED, MIGRATED, TemplateProvisioner
+from .views import ChecklistAnswerViewSet, FitoutChecklistViewSet, FitoutDeviationViewSet, MigrationJobAPIView, TenantSchemaDriftAPIView
+
+TENANT = "tenant_test"
+
+# Tenant aliases are registered at runtime; register one up front so the test runner
+# creates and migrates a database for it.
+connections.databases.setdefault(TENANT, {
+    **connections.databases["default"],
+    "ENGINE": "django.db.backends.sqlite3",
+    "NAME": ":memory:",
+    "TEST": {**connections.databases["default"]["TEST"], "DEPENDENCIES": []},
+})
+
+
+class FitoutDeviationListQueriesTests(TestCase):
+    databases = {TENANT}
+
+    @classmethod
+    def setUpTestData(cls):
+        status = DeviationStatus.objects.using(TENANT).create(order=1, name="Open", color="#FF0000")
+        request = FitoutRequest.objects.using(TENANT).create()
+        for i in range(30):
+            deviation = FitoutDeviation.objects.using(TENANT).create(status=status, fitout_request=request)
+            for n in range(2):
+                FitoutDeviationImage.objects.using(TENANT).create(deviation=deviation, image=f"deviation/images/{i}-{n}.png")
+            for n in range(3):
+                FitoutDeviationChat.objects.using(TENANT).create(deviation=deviation, message=f"m{n}", sender_id=1)
+
+    def _list(self, page_size):
+        request = APIRequestFactory().get("/api/fitout-deviations/", {"page_size": page_size})
+        force_authenticate(request, user=mock.Mock(spec=AnonymousUser, is_authenticated=True))
+        with mock.patch("api.views._request_alias", return_value=TENANT):
+            response = FitoutDeviationViewSet.as_view({"get": "list"})(request)
+            response.render()
+        return response
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        # count, deviations (+status), images, chats
+        with self.assertNumQueries(4, using=TENANT):
+            small = self._list(5)
+        with self.assertNumQueries(4, using=TENANT):
+            large = self._list(25)
+        self.assertEqual(len(small.data["results"]), 5)
+        self.assertEqual(len(large.data["results"]), 25)
+        self.assertEqual(len(large.data["results"][0]["images"]), 2)
+
+    def test_newest_deviations_first_with_latest_chats_in_order(self):
+        with mock.patch("api.views.DEVIATION_CHAT_PREFETCH_LIMIT", 2):
+            results = self._list(5).data["results"]
+        self.assertEqual([row["id"] for row in results], sorted((row["id"] for row in results), reverse=True))
+        self.assertEqual([chat["message"] for chat in results[0]["chats"]], ["m1", "m2"])
+
+
+@override_settings(ASYNC_READ_VIEWS=True)
+class ChecklistQueriesTests(TestCase):
+    databases = {TENANT}
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(12):
+            checklist = FitoutChecklist.objects.using(TENANT).create(name=f"c{i}")
+            for n in range(3):
+                question = ChecklistQuestion.objects.using(TENANT).create(checklist=checklist, question_text=f"q{n}")
+                for m in range(2):
+                    QuestionOption.objects.using(TENANT).create(question=question, option_text=f"o{m}")
+
+    def _get(self, viewset, path, params):
+        request = APIRequestFactory().get(path, params)
+        force_authenticate(request, user=mock.Mock(spec=AnonymousUser, is_authenticated=True))
+        with mock.patch("api.views._request_alias", return_value=TENANT):
+            response = async_to_sync(viewset.as_view({"get": "list"}))(request)
+            response.render()
+        return response
+
+    def test_checklist_tree_is_one_query_per_level(self):
+        # count, checklists, questions, options
+        with self.assertNumQueries(4, using=TENANT):
+            small = self._get(FitoutChecklistViewSet, "/api/fitout-checklists/", {"page_size": 2})
+        with self.assertNumQueries(4, using=TENANT):
+            large = self._get(FitoutChecklistViewSet, "/api/fitout-checklists/", {"page_size": 10})
+        self.assertEqual(len(small.data["results"]), 2)
+        self.assertEqual(len(large.data["results"]), 10)
+        self.assertEqual(len(large.data["results"][0]["questions"][0]["options"]), 2)
+
+    @override_settings(ASYNC_READ_VIEWS=False)
+    def test_wsgi_gets_the_sync_view(self):
+        view = FitoutChecklistViewSet.as_view({"get": "list"})
+        self.assertFalse(asyncio.iscoroutinefunction(view))
+        request = APIRequestFactory().get("/api/fitout-checklists/", {"page_size": 2})
+        force_authenticate(request, user=mock.Mock(spec=AnonymousUser, is_authenticated=True))
+        with mock.patch("api.views._request_alias", return_value=TENANT), self.assertNumQueries(4, using=TENANT):
+            response = view(request)
+            response.render()
+        self.assertEqual(len(response.data["results"]), 2)
+
+    def test_answers_join_question_and_option_in_one_query(self):
+        request = FitoutRequest.objects.using(TENANT).create()
+        questions = ChecklistQuestion.objects.using(TENANT).prefetch_related("options")
+        ChecklistAnswer.objects.using(TENANT).bulk_create([
+            ChecklistAnswer(fitout_request=request, question=question, question_option=option)
+            for question in questions for option in question.options.all()
+            for _ in range(3)
+        ][:200])
+        with self.assertNumQueries(1, using=TENANT):
+            response = self._get(ChecklistAnswerViewSet, "/api/checklist-answers/", {"fitout_request": request.id})
+        self.assertEqual(len(response.data), 200)
+        self.assertEqual(response.data[0]["selected_option_text"], "o0")
+        self.assertTrue(response.data[0]["question_text"])
+
+
+@override_settings(ASYNC_READ_VIEWS=True)
+class KeysetPaginationTests(TestCase):
+    databases = {TENANT}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.request = FitoutRequest.objects.using(TENANT).create()
+        checklist = FitoutChecklist.objects.using(TENANT).create(name="c")
+        cls.question = ChecklistQuestion.objects.using(TENANT).create(checklist=checklist, question_text="q")
+        for n in range(7):
+            ChecklistAnswer.objects.using(TENANT).create(fitout_request=cls.request, question=cls.question, answer_text=str(n))
+
+    def _list(self, params):
+        request = APIRequestFactory().get("/api/checklist-answers/", params)
+        force_authenticate(request, user=mock.Mock(spec=AnonymousUser, is_authenticated=True))
+        with mock.patch("api.views._request_alias", return_value=TENANT):
+            response = async_to_sync(ChecklistAnswerViewSet.as_view({"get": "list"}))(request)
+            response.render()
+        return response
+
+    def test_walks_every_row_once_despite_inserts(self):
+        seen, cursor = [], ""
+        while cursor is not None:
+            page = self._list({"cursor": cursor, "page_size": 3}).data
+            seen += [row["id"] for row in page["results"]]
+            if len(seen) == 3:
+                ChecklistAnswer.objects.using(TENANT).create(fitout_request=self.request, question=self.question)
+            cursor = page["next"] and parse_qs(urlparse(page["next"]).query)["cursor"][0]
+        self.assertEqual(len(seen), 7)
+        self.assertEqual(seen, sorted(seen, reverse=True))
+
+    def test_rejects_malformed_and_tampered_cursors(self):
+        salt = "api.pagination.cursor"
+        for cursor in (
+            "garbage",
+            signing.dumps({"v": 5, "i": 1, "r": False}, salt=salt),
+            signing.dumps({"v": None, "i": 1, "r": False}, salt=salt),
+            signing.dumps({"v": [1], "i": 1, "r": False}, salt=salt),
+            signing.dumps({"v": "2026-01-01T00:00:00", "i": "1", "r": False}, salt=salt),
+            signing.dumps({"v": "2026-01-01T00:00:00", "i": 1, "r": False}, salt="other"),
+        ):
+            self.assertEqual(self._list({"cursor": cursor}).status_code, 404, cursor)
+
+    def test_cursor_cannot_be_combined_with_question_order(self):
+        response = self._list({"cursor": "", "fitout_request": self.request.id})
+        self.assertEqual(response.status_code, 400)
+
+
+class _ChecklistCountSerializer(serializers.ModelSerializer):
+    questions_count = RelatedCountField("questions")
+
+    class Meta:
+        model = FitoutChecklist
+        fields = ["id", "questions_count"]
+
+
+class RelatedCountFieldTests(TestCase):
+    databases = {TENANT}
+
+    def test_annotation_skips_soft_deleted_rows_like_the_fallback(self):
+        checklist = FitoutChecklist.objects.using(TENANT).create(name="c")
+        for n in range(3):
+            ChecklistQuestion.objects.using(TENANT).create(checklist=checklist, question_text=f"q{n}", is_deleted=n == 0)
+
+        annotated = annotate_related_counts(FitoutChecklist.objects.using(TENANT), _ChecklistCountSerializer).get()
+        self.assertEqual(_ChecklistCountSerializer(annotated).data["questions_count"], 2)
+        self.assertEqual(_ChecklistCountSerializer(checklist).data["questions_count"], 2)
+
+
+class _StubAccounts(BaseHTTPRequestHandler):
+    """Serves the queued (status, body) responses in order; the last one repeats."""
+    responses = []
+    hits = 0
+    delay = 0.0
+
+    def do_GET(self):
+        cls = type(self)
+        cls.hits += 1
+        time.sleep(cls.delay)
+        status, body = cls.responses.pop(0) if len(cls.responses) > 1 else cls.responses[0]
+        payload = json.dumps(body).encode()
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client timed out
+
+    def log_message(self, *args):
+        pass
+
+
+class AccountsClientTests(SimpleTestCase):
+    DB_INFO = {
+        "alias": "client_7", "db_name": "fitout_7", "db_user": "u7", "db_host": "db7", "db_port": 5432,
+        "db_password_encrypted": "token",
+    }
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _StubAccounts)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        _StubAccounts.hits = 0
+        _StubAccounts.delay = 0.0
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def _serve(self, *responses):
+        _StubAccounts.responses = list(responses)
+
+    def test_retries_5xx_then_succeeds(self):
+        self._serve((503, {}), (200, {"ok": True}))
+        client = AccountsClient(retries=2, backoff=0)
+        resp = client.get(f"{self.url}/x")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(_StubAccounts.hits, 2)
+        self.assertEqual(client.stats()["failures"], 1)
+
+    def test_retries_share_one_deadline(self):
+        self._serve((200, {}))
+        _StubAccounts.delay = 0.4
+        client = AccountsClient(timeout=0.3, retries=2, backoff=0)
+        started = time.monotonic()
+        with self.assertRaises(AccountsUnavailableError):
+            client.get(f"{self.url}/x")
+        self.assertLess(time.monotonic() - started, 0.6)
+
+    def test_breaker_opens_and_short_circuits(self):
+        self._serve((500, {}))
+        client = AccountsClient(retries=0, backoff=0, breaker=CircuitBreaker(threshold=2, reset_timeout=60))
+        for _ in range(2):
+            with self.assertRaises(AccountsUnavailableError):
+                client.get(f"{self.url}/x")
+        with self.assertRaisesMessage(AccountsUnavailableError, "circuit open"):
+            client.get(f"{self.url}/x")
+        self.assertEqual(_StubAccounts.hits, 2)
+        self.assertEqual(client.stats()["short_circuited"], 1)
+
+    def test_falls_back_to_last_known_good(self):
+        store = LastKnownGoodStore(os.path.join(self.tmp.name, "lkg.json"))
+        client = AccountsClient(retries=0, backoff=0)
+        with mock.patch("api.utils.ACCOUNTS_URL", self.url), mock.patch("api.utils.accounts_client", client), \
+                mock.patch("api.utils.accounts_lkg", store):
+            self._serve((200, self.DB_INFO))
+            fresh = fetch_client_db_info(client_id=7)
+            self._serve((503, {}))
+            fallback = fetch_client_db_info(client_id=7)
+            with self.assertRaises(AccountsUnavailableError):
+                fetch_client_db_info(client_id=8)
+        self.assertEqual(fallback, fresh)
+
+    def test_last_known_good_merges_across_processes(self):
+        path = os.path.join(self.tmp.name, "lkg.json")
+        first, second = LastKnownGoodStore(path), LastKnownGoodStore(path)
+        first.get("id:1")
+        second.get("id:2")
+        first.put("id:1", {"alias": "client_1"})
+        second.put("id:2", {"alias": "client_2"})
+        self.assertEqual(LastKnownGoodStore(path).get("id:1"), {"alias": "client_1"})
+        self.assertEqual(first.get("id:2"), {"alias": "client_2"})
+
+
+class ReadReplicaRoutingTests(SimpleTestCase):
+    PRIMARY = "client_rr"
+    REPLICA = "client_rr_replica1"
+
+    def setUp(self):
+        connections.databases[self.REPLICA] = dict(connections.databases[TENANT])
+        set_replicas(self.PRIMARY, [self.REPLICA])
+        set_replica_available(self.REPLICA, True)
+        self.addCleanup(connections.databases.pop, self.REPLICA, None)
+        self.addCleanup(set_replicas, self.PRIMARY, ())
+
+    def _read_alias(self, method):
+        seen = []
+
+        def view(request):
+            seen.append(MultiTenantRouter().db_for_read(FitoutRequest))
+            return mock.Mock(status_code=200)
+
+        request = RequestFactory().generic(method, "/api/fitout-requests/", HTTP_X_TENANT_ALIAS=self.PRIMARY)
+        TenantMiddleware(view)(request)
+        return seen[0]
+
+    def test_safe_requests_read_from_the_replica(self):
+        self.assertEqual(self._read_alias("GET"), self.REPLICA)
+
+    def test_unsafe_requests_read_from_the_primary(self):
+        for method in ("POST", "PUT", "PATCH", "DELETE"):
+            self.assertEqual(self._read_alias(method), self.PRIMARY, method)
+
+
+@override_settings(DEBUG=True)
+@mock.patch.dict(os.environ, {"INTERNAL_REGISTER_DB_TOKEN": "s3cret"})
+class TenantSchemaDriftAPITests(SimpleTestCase):
+    REPORT = {"latest": None, "scanned": 0, "tenants": []}
+
+    def _get(self, params=None, token=None):
+        headers = {"HTTP_X_INTERNAL_TOKEN": token} if token else {}
+        request = APIRequestFactory().get("/api/admin/tenant-schema-drift/", params or {}, **headers)
+        return TenantSchemaDriftAPIView.as_view()(request)
+
+    def test_requires_internal_token_even_in_debug(self):
+        self.assertEqual(self._get().status_code, 403)
+        self.assertEqual(self._get(token="wrong").status_code, 403)
+
+    def test_directory_scope_is_opt_in(self):
+        with mock.patch("api.views.scan_schema_drift", return_value=dict(self.REPORT)), \
+                mock.patch("api.views.prewarm_tenants", return_value=[]) as prewarm, \
+                mock.patch("api.views.default_tenants", return_value=[]):
+            self.assertEqual(self._get(token="s3cret").status_code, 200)
+            prewarm.assert_not_called()
+            self.assertEqual(self._get({"scope": "directory"}, token="s3cret").status_code, 200)
+            prewarm.assert_called_once()
+
+
+class MigrationJobTests(SimpleTestCase):
+    def setUp(self):
+        self.orchestrator = MigrationOrchestrator(cache_alias="default")
+
+    def test_job_without_heartbeat_is_reported_failed(self):
+        job_id = self.orchestrator._create_job(["client_1", "client_2"])
+        job = self.orchestrator.job(job_id)
+        job["tenants"]["client_1"] = {"alias": "client_1", "status": SUCCEEDED}
+        self.orchestrator._save(job_id, job)
+
+        with mock.patch("api.tenant_migrations.time.time", return_value=job["heartbeat_at"] + TENANT_MIGRATE_STALE_AFTER + 1):
+            job = self.orchestrator.job(job_id)
+        self.assertEqual(job["status"], FAILED)
+        self.assertEqual(job["tenants"]["client_1"]["status"], SUCCEEDED)
+        self.assertEqual(job["tenants"]["client_2"]["status"], FAILED)
+        self.assertEqual(self.orchestrator.job(job_id)["status"], FAILED)
+
+    def test_fresh_job_is_left_alone(self):
+        job_id = self.orchestrator._create_job(["client_1"])
+        self.assertEqual(self.orchestrator.job(job_id)["status"], "pending")
+
+    @mock.patch.dict(os.environ, {"INTERNAL_REGISTER_DB_TOKEN": "s3cret"})
+    def test_job_endpoint_requires_internal_token(self):
+        job_id = self.orchestrator._create_job(["client_1"])
+        view = MigrationJobAPIView.as_view()
+        with mock.patch("api.views.migration_orchestrator", self.orchestrator):
+            denied = view(APIRequestFactory().get("/"), job_id=job_id)
+            allowed = view(APIRequestFactory().get("/", HTTP_X_INTERNAL_TOKEN="s3cret"), job_id=job_id)
+        self.assertEqual(denied.status_code, 403)
+        self.assertEqual(allowed.status_code, 200)
+
+
+class _FakeAdminConnection:
+    def __init__(self, existing):
+        self.existing = existing
+        self.statements = []
+        self._rows = []
+
+    def cursor(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def execute(self, query, params=None):
+        self.statements.append(query if isinstance(query, str) else repr(query))
+        self._rows = [(1,)] if params and params[0] in self.existing else []
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self):
+        return []
+
+
+@mock.patch("api.tenant_migrations.TENANT_PROVISION_MODE", "template")
+class TemplateProvisioningTests(SimpleTestCase):
+    def setUp(self):
+        self.orchestrator = MigrationOrchestrator(cache_alias="default")
+        self.provisioner = TemplateProvisioner()
+        self.addCleanup(caches["default"].clear)
+
+    def _migrate(self, existing=()):
+        conn = _FakeAdminConnection(set(existing))
+        with mock.patch("api.tenant_migrations.template_provisioner", self.provisioner), \
+                mock.patch.object(self.provisioner, "_admin", return_value=conn), \
+                mock.patch.object(self.provisioner, "is_current", return_value=True), \
+                mock.patch.object(self.provisioner, "_release"), \
+                mock.patch.object(self.orchestrator, "sync_template"), \
+                mock.patch("api.tenant_migrations.schema_version", return_value="0001_initial"), \
+                mock.patch("api.tenant_migrations.call_command") as migrate:
+            result = self.orchestrator.migrate_alias(TENANT)
+        return result, migrate, conn
+
+    @mock.patch("api.tenant_template.TENANT_TEMPLATE_DB_USER", "template_owner")
+    def test_new_database_is_cloned_and_handed_over(self):
+        result, migrate, conn = self._migrate()
+        self.assertEqual(result["method"], CLONED)
+        self.assertTrue(result["ok"])
+        migrate.assert_not_called()
+        self.assertTrue(any("TEMPLATE" in statement for statement in conn.statements))
+        self.assertTrue(any("relowner" in statement for statement in conn.statements))
+
+    @mock.patch("api.tenant_template.TENANT_TEMPLATE_DB_USER", "template_owner")
+    def test_existing_database_is_migrated(self):
+        result, migrate, conn = self._migrate(existing={connections.databases[TENANT]["NAME"]})
+        self.assertEqual(result["method"], MIGRATED)
+        self.assertTrue(result["ok"])
+        migrate.assert_called_once()
+        self.assertFalse(any("CREATE DATABASE" in statement for statement in conn.statements))
+
+    @mock.patch("api.tenant_template.TENANT_TEMPLATE_DB_USER", "")
+    def test_template_mode_without_dedicated_role_fails_fast(self):
+        with self.assertLogs("asset.tenant_migrations", "ERROR"):
+            result, migrate, conn = self._migrate()
+        self.assertFalse(result["ok"])
+        self.assertIn("TENANT_TEMPLATE_DB_USER", result["error"])
+        migrate.assert_not_called()
+        self.assertEqual(conn.statements, [])
+
+
+class TenantHealthSharingTests(SimpleTestCase):
+    def setUp(self):
+        caches["default"].clear()
+        self.addCleanup(caches["default"].clear)
+
+    def test_workers_share_one_probe_per_interval(self):
+        workers = [TenantHealthMonitor(interval=30, cache_alias="default") for _ in range(3)]
+        with mock.patch("api.utils.test_db_connection", return_value=(True, None)) as probe:
+            states = [worker.probe(TENANT) for worker in workers]
+        self.assertEqual(probe.call_count, 1)
+        self.assertEqual(states, [HEALTHY] * 3)
+
+    def test_failures_accumulate_across_workers(self):
+        first, second = (TenantHealthMonitor(interval=30, down_after=2, cache_alias="default") for _ in range(2))
+        with mock.patch("api.utils.test_db_connection", return_value=(False, "refused")) as probe, \
+                self.assertLogs("asset.tenant_health", "WARNING"):
+            self.assertEqual(first.probe(TENANT), DEGRADED)
+            caches["default"].delete(f"tenant_health:lease:{TENANT}")
+            with mock.patch("api.tenant_health.time.time", return_value=time.time() + 31):
+                self.assertEqual(second.probe(TENANT), DOWN)
+            self.assertEqual(first.probe(TENANT), DOWN)
+        self.assertEqual(probe.call_count, 2)
+
+
+class TenantRegistryTests(SimpleTestCase):
+    def setUp(self):
+        self.registry = TenantRegistry(max_aliases=2, max_pool_connections=0)
+        self.addCleanup(lambda: [self.registry.unregister(alias) for alias in self.registry.aliases()])
+
+    def _resolver(self, alias, calls=None, delay=0.0):
+        def resolve():
+            if calls is not None:
+                calls.append(alias)
+            time.sleep(delay)
+            self.registry.publish(alias, {**connections.databases[TENANT]})
+            return alias
+        return resolve
+
+    def test_concurrent_ensure_resolves_once(self):
+        calls, results = [], []
+        barrier = threading.Barrier(8)
+
+        def worker():
+            barrier.wait()
+            results.append(self.registry.ensure("id:1", self._resolver("client_1", calls, delay=0.1)))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(calls, ["client_1"])
+        self.assertEqual(results, ["client_1"] * 8)
+        self.assertEqual(self.registry.stats()["misses"], 1)
+
+    def test_lru_alias_is_evicted_and_reregistered_lazily(self):
+        calls = []
+        for n in (1, 2):
+            self.registry.ensure(f"id:{n}", self._resolver(f"client_{n}", calls))
+        self.registry.ensure("id:1", self._resolver("client_1", calls))  # client_2 is now LRU
+        self.registry.ensure("id:3", self._resolver("client_3", calls))
+
+        self.assertEqual(self.registry.aliases(), ["client_1", "client_3"])
+        self.assertNotIn("client_2", connections.databases)
+        self.assertIsNone(self.registry.lookup("id:2"))
+        self.assertEqual(self.registry.ensure("id:2", self._resolver("client_2", calls)), "client_2")
+        self.assertEqual(calls, ["client_1", "client_2", "client_3", "client_2"])
+        self.assertEqual(self.registry.stats()["evictions"], 2)
+
+    def test_held_alias_is_not_evicted_until_released(self):
+        for n in (1, 2):
+            self.registry.ensure(f"id:{n}", self._resolver(f"client_{n}"))
+        with self.registry.hold(["client_1", "client_2"]):
+            self.registry.ensure("id:3", self._resolver("client_3"))
+            self.assertEqual(self.registry.aliases(), ["client_1", "client_2", "client_3"])
+        self.assertEqual(self.registry.aliases(), ["client_2", "client_3"])
+        self.assertIsNone(self.registry.lookup("id:1"))
+
+    def test_replica_is_evicted_with_its_primary(self):
+        self.registry.ensure("id:1", self._resolver("client_1"))
+        self.registry.publish("client_1_replica", {**connections.databases[TENANT]}, primary="client_1")
+        self.registry.ensure("id:2", self._resolver("client_2"))
+
+        self.assertEqual(self.registry.aliases(), ["client_2"])
+        self.assertNotIn("client_1_replica", connections.databases)
+        self.assertEqual(self.registry.stats()["evictions"], 2)
+
+
+@mock.patch("fitout.auth.time.time", return_value=1_000_000.0)
+class VerifiedTokenCacheTests(SimpleTestCase):
+    def test_entry_misses_at_and_after_exp(self, now):
+        cache = VerifiedTokenCache(maxsize=4, max_ttl=900)
+        cache.put("token", 1_000_060, "user")
+        now.return_value = 1_000_059.9
+        self.assertEqual(cache.get("token"), "user")
+        now.return_value = 1_000_060.0
+        self.assertIsNone(cache.get("token"))
+        now.return_value = 1_000_030.0
+        self.assertIsNone(cache.get("token"))  # expired entries are dropped, not kept for later
+        self.assertEqual(cache.stats()["expired"], 1)
+
+    def test_entry_without_exp_expires_after_max_ttl(self, now):
+        cache = VerifiedTokenCache(maxsize=4, max_ttl=900)
+        cache.put("token", None, "user")
+        now.return_value = 1_000_900.0
+        self.assertIsNone(cache.get("token"))
+
+    def test_maxsize_evicts_least_recently_used(self, now):
+        cache = VerifiedTokenCache(maxsize=2, max_ttl=900)
+        cache.put("a", None, "user_a")
+        cache.put("b", None, "user_b")
+        cache.get("a")
+        cache.put("c", None, "user_c")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "user_a")
+        self.assertEqual(cache.get("c"), "user_c")
+        self.assertEqual(cache.stats()["size"], 2)
+
+
+class NameResolutionTests(SimpleTestCase):
+    def setUp(self):
+        caches["default"].clear()
+        self.addCleanup(caches["default"].clear)
+        self.request = RequestFactory().get("/")
+
+    @staticmethod
+    def _response(body):
+        return mock.Mock(status_code=200, json=mock.Mock(return_value=body))
+
+    @mock.patch("api.utils.INTERNAL_MASTER_BATCH", True)
+    def test_batch_mode_fetches_all_misses_in_one_call(self):
+        body = [{"id": 1, "name": "Tower A"}, {"id": 2, "name": "Tower B"}]
+        with mock.patch("api.utils.http_client.get", return_value=self._response(body)) as get:
+            names = resolve_names("buildings", [1, 2, 2, None, 3], self.request)
+            again = resolve_names("buildings", [1, 2, 3], self.request)
+        self.assertEqual(names, {1: "Tower A", 2: "Tower B", 3: None})
+        self.assertEqual(again, names)
+        get.assert_called_once()
+        self.assertEqual(get.call_args.kwargs["params"]["ids"], "1,2,3")
+
+    @mock.patch("api.utils.INTERNAL_MASTER_BATCH", False)
+    def test_fan_out_fetches_each_miss_once(self):
+        def fetch(url, **kwargs):
+            return self._response({"name": f"Floor {url.rstrip('/').rsplit('/', 1)[-1]}"})
+
+        resolver = NameResolver(self.request)
+        with mock.patch("api.utils.http_client.get", side_effect=fetch) as get:
+            resolver.prime("floors", [4, 5, 6, 5])
+            names = [resolver.name("floors", i) for i in (4, 5, 6)]
+        self.assertEqual(names, ["Floor 4", "Floor 5", "Floor 6"])
+        self.assertEqual(get.call_count, 3)
@@ -6,7 +6,7 @@ from rest_framework.authtoken.views import obtain_auth_token
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
 from .views import (
-    FitoutTypeViewSet, RegisterDBByClientAPIView,  FitOutRequestViewSet,
+    FitoutTypeViewSet, RegisterDBByClientAPIView, MigrationJobAPIView, TenantSchemaDriftAPIView, FitOutRequestViewSet,
     FitoutDeviationViewSet,
     FitoutChecklistViewSet,
     FitoutRequestChatViewSet,
@@ -54,6 +54,8 @@ router.register(r'payment-modes', PaymentModeViewSet, basename='payment-mode')
 
 urlpatterns = [
     path("register-db/", RegisterDBByClientAPIView.as_view(), name="register-db"),
+    path("register-db/jobs/<str:job_id>/", MigrationJobAPIView.as_view(), name="register-db-job"),
+    path("admin/tenant-schema-drift/", TenantSchemaDriftAPIView.as_view(), name="tenant-schema-drift"),
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token-refresh'),
     
@@ -4,15 +4,21 @@ from django.urls import path
 import json
 import logging
 import os
+import threading
+import time
 from typing import Optional, Dict, Any, Tuple
 
 import psycopg2
-import requests
-from cryptography.fernet import Fernet
+from cryptography.fernet import Fernet, MultiFernet
 from django.conf import settings
-from django.core.cache import cache
 from django.db import connections
 
+from .accounts_client import AccountsUnavailableError, accounts_client, accounts_lkg
+from .tenant_cache import TwoTierCache
+from .tenant_directory import tenant_directory
+from .tenant_health import tenant_health
+from .tenant_registry import client_key, tenant_registry
+
 logger = logging.getLogger("asset.utils")
 
 # LOCAL_DB_HOST = "192.168.29.168"
@@ -21,10 +27,22 @@ LOCAL_DB_HOST = "127.0.0.1"
 CACHE_TTL_SECONDS = 2000
 ACCOUNTS_URL = os.getenv("ACCOUNTS_SERVICE_URL", f"http://{LOCAL_DB_HOST}:8000").rstrip("/")
 INTERNAL_REGISTER_DB_TOKEN = os.getenv("INTERNAL_REGISTER_DB_TOKEN", "").strip()
-ACCOUNTS_TIMEOUT = int(os.getenv("ACCOUNTS_HTTP_TIMEOUT", "10"))
 DB_ENCRYPTION_KEY = os.getenv("DB_ENCRYPTION_KEY", "").strip()
 TENANT_CONN_MAX_AGE = int(os.getenv("TENANT_CONN_MAX_AGE", "60"))
 TENANT_CONN_TIMEOUT = int(os.getenv("TENANT_CONN_TIMEOUT", "5"))
+TENANT_POOL_ENABLED = os.getenv("TENANT_POOL_ENABLED", "0") == "1"
+TENANT_POOL_MIN_SIZE = int(os.getenv("TENANT_POOL_MIN_SIZE", "0"))
+TENANT_POOL_MAX_SIZE = int(os.getenv("TENANT_POOL_MAX_SIZE", "4"))
+TENANT_POOL_TIMEOUT = int(os.getenv("TENANT_POOL_TIMEOUT", "10"))
+DECRYPT_CACHE_TTL = int(os.getenv("DECRYPT_CACHE_TTL", "300"))
+DECRYPT_CACHE_SIZE = 256
+
+_DB_FERNET: Optional[MultiFernet] = None  # built on first use from DB_ENCRYPTION_KEY
+_decrypted: Dict[str, Tuple[str, float]] = {}  # ciphertext -> (plaintext, expires_at)
+_decrypted_lock = threading.Lock()
+
+# Plaintext passwords (no DB_ENCRYPTION_KEY to encrypt them with) never reach the shared tier.
+tenant_info_cache = TwoTierCache(soft_ttl=CACHE_TTL_SECONDS, shareable=lambda data: not data.get("db_password"))
 
 
 
@@ -34,18 +52,23 @@ def get_cached_client_db_info(
     """
     Retrieve tenant database credentials from cache or fetch from the Accounts service.
 
+    Entries older than CACHE_TTL_SECONDS are served stale while one background refresh
+    replaces them, so only a tenant never seen by any worker waits on Accounts.
+
     :param client_id: Numeric client identifier.
     :param client_username: Username uniquely identifying the client.
     :return: A mapping containing alias, db_name, db_user, db_password(_encrypted), db_host, db_port.
     :raises ValueError: If neither client_id nor client_username is provided.
     :raises RuntimeError: For upstream errors or malformed responses.
     """
-    cache_key = f"tenant_db_info:{client_id or client_username}"
-    data = cache.get(cache_key)
-    if not data:
-        data = fetch_client_db_info(client_id=client_id, client_username=client_username)
-        cache.set(cache_key, data, CACHE_TTL_SECONDS)
-    return data
+    return tenant_info_cache.get_or_fetch(
+        _info_cache_key(client_id=client_id, client_username=client_username),
+        lambda: _shareable_db_info(fetch_client_db_info(client_id=client_id, client_username=client_username)),
+    )
+
+
+def _info_cache_key(*, client_id: Optional[int] = None, client_username: Optional[str] = None) -> str:
+    return f"tenant_db_info:{client_id or client_username}"
 
 
 def ensure_alias_for_client(
@@ -54,31 +77,54 @@ def ensure_alias_for_client(
     """
     Ensure a Django database alias exists for the given client.
 
+    Concurrent calls for the same client share a single resolution through the tenant registry.
+    Registration is optimistic: connectivity is checked by the background health monitor, and
+    aliases it has marked down fail fast here. An alias refreshed by another worker (newer
+    shared directory version) is re-registered from the shared cache.
+
     :param client_id: Numeric client identifier.
     :param client_username: Username uniquely identifying the client.
     :return: The registered Django database alias (e.g., "client_1845").
     :raises ValueError: If neither client_id nor client_username is provided.
     :raises RuntimeError: If connectivity or registration fails.
     """
+    if not (client_id or client_username):
+        raise ValueError("Provide client_id or client_username")
+
+    key = client_key(client_id=client_id, client_username=client_username)
+    register = lambda: _register_alias_for_client(client_id=client_id, client_username=client_username)
+    alias = tenant_registry.ensure(key, register)
+    if tenant_directory.is_stale(alias):
+        logger.info("DB alias '%s' was refreshed by another worker; re-registering", alias)
+        tenant_registry.unregister(alias)
+        tenant_info_cache.delete_local(_info_cache_key(client_id=client_id, client_username=client_username))
+        alias = tenant_registry.ensure(key, register)
+    if tenant_health.is_down(alias):
+        raise RuntimeError(f"Tenant DB '{alias}' is down")
+    return alias
+
+
+def _register_alias_for_client(
+    *, client_id: Optional[int] = None, client_username: Optional[str] = None
+) -> str:
+    """
+    Resolve and register the alias for a client. Called once per in-flight registration.
+
+    :param client_id: Numeric client identifier.
+    :param client_username: Username uniquely identifying the client.
+    :return: The registered Django database alias.
+    :raises RuntimeError: If registration fails.
+    """
     data = get_cached_client_db_info(client_id=client_id, client_username=client_username)
     alias = data["alias"]
+    tenant_directory.record_client(client_key(client_id=client_id, client_username=client_username), alias)
 
-    if alias in settings.DATABASES:
+    if alias in connections.databases:
         logger.debug("Alias %s already registered", alias)
         return alias
 
     password = decrypt_password(data["db_password_encrypted"]) if data.get("db_password_encrypted") else data["db_password"]
 
-    ok, err = test_db_connection(
-        name=data["db_name"],
-        user=data["db_user"],
-        password=password,
-        host=LOCAL_DB_HOST,
-        port=str(data["db_port"]),
-    )
-    if not ok:
-        raise RuntimeError(f"DB connect failed: {err}")
-
     add_db_alias(
         alias=alias,
         db_name=data["db_name"],
@@ -86,38 +132,79 @@ def ensure_alias_for_client(
         db_password=password,
         db_host=data["db_host"],
         db_port=str(data["db_port"]),
+        pool_min_size=data.get("pool_min_size"),
+        pool_max_size=data.get("pool_max_size"),
     )
+    tenant_directory.mark_registered(alias)
+    tenant_health.watch(alias)
+    _register_replicas(alias, data, password)
     logger.info("DB alias '%s' registered", alias)
     return alias
 
 
+def _register_replicas(alias: str, data: Dict[str, Any], password: str) -> None:
+    """
+    Register the tenant's read replicas, if Accounts lists any, as sibling aliases
+    ``<alias>_replica<n>`` sharing the primary's credentials.
+
+    ``data["replicas"]`` entries are "host[:port]" strings or objects with db_host and
+    optional db_port / db_name. Replicas take reads once the health monitor has probed them.
+
+    :param alias: Primary alias.
+    :param data: Accounts DB info for the tenant.
+    :param password: Decrypted primary password.
+    """
+    replicas = []
+    for n, replica in enumerate(data.get("replicas") or [], start=1):
+        if isinstance(replica, str):
+            host, _, port = replica.partition(":")
+            replica = {"db_host": host, "db_port": port or data["db_port"]}
+        replica_alias = f"{alias}_replica{n}"
+        try:
+            add_db_alias(
+                alias=replica_alias,
+                db_name=str(replica.get("db_name") or data["db_name"]),
+                db_user=data["db_user"],
+                db_password=password,
+                db_host=str(replica["db_host"]),
+                db_port=str(replica.get("db_port") or data["db_port"]),
+                pool_min_size=data.get("pool_min_size"),
+                pool_max_size=data.get("pool_max_size"),
+                connect_host=str(replica["db_host"]),
+                primary=alias,
+            )
+        except (KeyError, RuntimeError) as e:
+            logger.warning("Skipping replica %s of '%s': %s", n, alias, e)
+            continue
+        tenant_health.watch(replica_alias)
+        replicas.append(replica_alias)
+    set_replicas(alias, replicas)
+
+
 def refresh_alias_for_client(
     *, client_id: Optional[int] = None, client_username: Optional[str] = None
 ) -> str:
     """
     Refresh the tenant database alias by evicting cache and re-registering the alias.
 
+    Bumps the alias's shared directory version so other workers re-register it too.
+
     :param client_id: Numeric client identifier.
     :param client_username: Username uniquely identifying the client.
     :return: The refreshed Django database alias.
     :raises ValueError: If neither client_id nor client_username is provided.
     :raises RuntimeError: If upstream fetch or alias recreation fails.
     """
-    cache_key = f"tenant_db_info:{client_id or client_username}"
-    cache.delete(cache_key)
-
-    data = fetch_client_db_info(client_id=client_id, client_username=client_username)
-    alias = data["alias"]
-
-    try:
-        connections[alias].close()
-    except Exception:
-        pass
+    cache_key = _info_cache_key(client_id=client_id, client_username=client_username)
+    tenant_info_cache.delete(cache_key)
 
-    settings.DATABASES.pop(alias, None)
-    connections.databases.pop(alias, None)
+    data = _shareable_db_info(fetch_client_db_info(client_id=client_id, client_username=client_username))
+    tenant_info_cache.set(cache_key, data)
+    tenant_registry.unregister(data["alias"])
 
-    return ensure_alias_for_client(client_id=client_id, client_username=client_username)
+    alias = ensure_alias_for_client(client_id=client_id, client_username=client_username)
+    tenant_directory.bump(alias)
+    return alias
 
 
 def _headers() -> Dict[str, str]:
@@ -138,6 +225,9 @@ def fetch_client_db_info(
     """
     Fetch tenant database credentials from the Accounts service.
 
+    When Accounts is unavailable (circuit open, transport errors or 5xx after retries) the
+    last-known-good snapshot for the client is returned instead, if one was persisted.
+
     :param client_id: Numeric client identifier.
     :param client_username: Username uniquely identifying the client.
     :return: A mapping containing alias, db_name, db_user, db_password(_encrypted), db_host, db_port.
@@ -157,11 +247,16 @@ def fetch_client_db_info(
         url = f"{ACCOUNTS_URL}/api/master/user-dbs/by-username/{client_username}"
         params = {"username": client_username}
 
+    lkg_key = client_key(client_id=client_id, client_username=client_username)
     logger.info("Fetching client DB info: %s params=%s", url, params)
     try:
-        resp = requests.get(url, headers=_headers(), params=params, timeout=ACCOUNTS_TIMEOUT)
-    except requests.RequestException as e:
-        raise RuntimeError(f"Accounts request failed: {e}") from e
+        resp = accounts_client.get(url, headers=_headers(), params=params)
+    except AccountsUnavailableError as e:
+        snapshot = accounts_lkg.get(lkg_key)
+        if snapshot is None:
+            raise
+        logger.warning("%s; using last-known-good DB info for %s", e, lkg_key)
+        return snapshot
 
     if resp.status_code != 200:
         body = _safe_trunc(resp.text)
@@ -186,13 +281,61 @@ def fetch_client_db_info(
     data["db_user"] = str(data["db_user"])
     data["db_host"] = str(data["db_host"])
     data["db_port"] = str(data["db_port"])
+
+    snapshot = _encrypted_db_info(data)
+    if snapshot is not None:
+        accounts_lkg.put(lkg_key, snapshot)
     return data
 
 
+def _encrypted_db_info(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Copy of Accounts DB info that is safe to persist or share: plaintext passwords are
+    encrypted first and only decrypted when an alias is registered.
+
+    :param data: Validated Accounts response.
+    :return: The copy, or None if a plaintext password cannot be encrypted.
+    """
+    snapshot = dict(data)
+    if snapshot.pop("db_password", None) and not snapshot.get("db_password_encrypted"):
+        if not DB_ENCRYPTION_KEY:
+            return None
+        snapshot["db_password_encrypted"] = _db_fernet().encrypt(data["db_password"].encode()).decode()
+    return snapshot
+
+
+def _shareable_db_info(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    DB info as stored in the tenant cache: encrypted when a key is configured.
+
+    :param data: Validated Accounts response.
+    :return: Encrypted copy, or ``data`` unchanged if there is no key to encrypt with
+        (``tenant_info_cache`` then keeps it out of the shared tier).
+    """
+    return _encrypted_db_info(data) or data
+
+
+def _build_fernet() -> Optional[MultiFernet]:
+    keys = [k.strip() for k in DB_ENCRYPTION_KEY.split(",") if k.strip()]
+    return MultiFernet([Fernet(k.encode()) for k in keys]) if keys else None
+
+
+def _db_fernet() -> MultiFernet:
+    global _DB_FERNET
+    if _DB_FERNET is None:
+        _DB_FERNET = _build_fernet()
+    return _DB_FERNET
+
+
 def decrypt_password(enc_password: str) -> str:
     """
     Decrypt a Fernet-encrypted database password.
 
+    DB_ENCRYPTION_KEY may list several comma-separated keys (newest first) so ciphertexts
+    made with a retired key still decrypt during rotation. Plaintexts are memoized per
+    ciphertext for DECRYPT_CACHE_TTL seconds, so re-registering an evicted or refreshed
+    alias skips the key derivation and HMAC check.
+
     :param enc_password: Ciphertext in URL-safe base64 format.
     :return: Decrypted plaintext password.
     :raises RuntimeError: If the encryption key is missing or decryption fails.
@@ -200,12 +343,24 @@ def decrypt_password(enc_password: str) -> str:
     if not DB_ENCRYPTION_KEY:
         raise RuntimeError("DB_ENCRYPTION_KEY not set; cannot decrypt db_password_encrypted")
 
+    now = time.monotonic()
+    with _decrypted_lock:
+        hit = _decrypted.get(enc_password)
+        if hit is not None and hit[1] > now:
+            return hit[0]
+
     try:
-        f = Fernet(DB_ENCRYPTION_KEY.encode())
-        return f.decrypt(enc_password.encode()).decode()
+        plaintext = _db_fernet().decrypt(enc_password.encode()).decode()
     except Exception as e:
         raise RuntimeError(f"Fernet decrypt failed: {e}") from e
 
+    with _decrypted_lock:
+        if len(_decrypted) >= DECRYPT_CACHE_SIZE:
+            for key in [k for k, (_, expires) in _decrypted.items() if expires <= now] or [next(iter(_decrypted))]:
+                del _decrypted[key]
+        _decrypted[enc_password] = (plaintext, now + DECRYPT_CACHE_TTL)
+    return plaintext
+
 
 def test_db_connection(
     *, name: str, user: str, password: str, host: str, port: str, timeout: int = TENANT_CONN_TIMEOUT
@@ -221,7 +376,6 @@ def test_db_connection(
     :param timeout: Connect timeout in seconds.
     :return: Tuple (ok, error_message). If ok is True, error_message is None.
     """
-    logger.info("Testing DB connection to %s@%s:%s/%s", user, host, port, name)
     conn = None
     try:
         conn = psycopg2.connect(
@@ -232,10 +386,8 @@ def test_db_connection(
             port=port,
             connect_timeout=timeout,
         )
-        logger.info("DB connection OK")
         return True, None
     except Exception as e:
-        logger.error("DB connection FAILED: %s", e, exc_info=True)
         return False, str(e)
     finally:
         if conn:
@@ -245,24 +397,84 @@ def test_db_connection(
                 pass
 
 
-def add_db_alias(*, alias: str, db_name: str, db_user: str, db_password: str, db_host: str, db_port: str) -> str:
+def replica_lag_seconds(
+    *, name: str, user: str, password: str, host: str, port: str, timeout: int = TENANT_CONN_TIMEOUT
+) -> Tuple[Optional[float], Optional[str]]:
+    """
+    Measure how far a PostgreSQL streaming replica is behind its primary.
+
+    A replica that has replayed everything it received counts as 0 seconds behind, so an
+    idle primary does not look like lag.
+
+    :param name: Database name.
+    :param user: Database user.
+    :param password: Database password.
+    :param host: Replica host.
+    :param port: Replica port as string.
+    :param timeout: Connect timeout in seconds.
+    :return: Tuple (lag_seconds, error_message); lag_seconds is None if the probe failed.
+    """
+    conn = None
+    try:
+        conn = psycopg2.connect(
+            dbname=name, user=user, password=password, host=host, port=port, connect_timeout=timeout
+        )
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() "
+                "THEN 0 ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+            )
+            return float(cur.fetchone()[0]), None
+    except Exception as e:
+        logger.error("Replica lag probe FAILED: %s", e)
+        return None, str(e)
+    finally:
+        if conn:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
+def add_db_alias(
+    *,
+    alias: str,
+    db_name: str,
+    db_user: str,
+    db_password: str,
+    db_host: str,
+    db_port: str,
+    pool_min_size: Optional[int] = None,
+    pool_max_size: Optional[int] = None,
+    connect_host: Optional[str] = None,
+    primary: Optional[str] = None,
+) -> str:
     """
     Register a Django database alias at runtime.
 
+    With TENANT_POOL_ENABLED the alias uses a psycopg connection pool shared by all threads
+    (requires psycopg 3 with psycopg_pool) instead of one persistent connection per thread.
+
     :param alias: The alias to register.
     :param db_name: Database name.
     :param db_user: Database user.
     :param db_password: Database password.
     :param db_host: Database host recorded for logging.
     :param db_port: Database port as string.
+    :param pool_min_size: Per-tenant pool min_size; defaults to TENANT_POOL_MIN_SIZE.
+    :param pool_max_size: Per-tenant pool max_size; defaults to TENANT_POOL_MAX_SIZE.
+    :param connect_host: Host to connect to; defaults to LOCAL_DB_HOST (used for replicas).
+    :param primary: Primary alias when registering one of its read replicas; the replica is
+        evicted and unregistered together with it.
     :return: The registered alias.
+    :raises RuntimeError: If the pool would exceed the global tenant connection ceiling.
     """
     cfg = {
         "ENGINE": "django.db.backends.postgresql",
         "NAME": db_name,
         "USER": db_user,
         "PASSWORD": db_password,
-        "HOST": LOCAL_DB_HOST,
+        "HOST": connect_host or LOCAL_DB_HOST,
         "PORT": db_port,
         "CONN_MAX_AGE": TENANT_CONN_MAX_AGE,
         "CONN_HEALTH_CHECKS": True,
@@ -271,9 +483,18 @@ def add_db_alias(*, alias: str, db_name: str, db_user: str, db_password: str, db
         "TIME_ZONE": getattr(settings, "TIME_ZONE", None),
         "OPTIONS": {"connect_timeout": TENANT_CONN_TIMEOUT},
     }
-
-    settings.DATABASES[alias] = cfg
-    connections.databases[alias] = cfg
+    if TENANT_POOL_ENABLED:
+        # Pooled connections are returned to the pool on close, so persistence and
+        # per-checkout health checks are left to psycopg_pool.
+        cfg["CONN_MAX_AGE"] = 0
+        cfg["CONN_HEALTH_CHECKS"] = False
+        cfg["OPTIONS"]["pool"] = {
+            "min_size": int(pool_min_size if pool_min_size is not None else TENANT_POOL_MIN_SIZE),
+            "max_size": int(pool_max_size if pool_max_size is not None else TENANT_POOL_MAX_SIZE),
+            "timeout": TENANT_POOL_TIMEOUT,
+        }
+
+    tenant_registry.publish(alias, cfg, primary=primary)
     logger.info("Registered DB alias '%s' -> %s@%s:%s/%s", alias, db_user, db_host, db_port, db_name)
     return alias
 
@@ -290,11 +511,31 @@ def _safe_trunc(s: str, n: int = 280) -> str:
     return s if len(s) <= n else (s[:n] + "…")
 
 
-import os, requests
+import random
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable
+
 from django.core.cache import cache
 
+from fitout.db_router import get_current_tenant, set_replicas
+from .http_client import http_client
+
 INTERNAL_MASTER_BASE = os.getenv("INTERNAL_MASTER_BASE", "http://127.0.0.1:8000").rstrip("/")
 INTERNAL_MASTER_TIMEOUT = int(os.getenv("INTERNAL_MASTER_TIMEOUT", "5"))
+# Set when the master service supports GET /api/<kind>/?ids=1,2,3; otherwise misses fan out.
+INTERNAL_MASTER_BATCH = os.getenv("INTERNAL_MASTER_BATCH", "0") == "1"
+INTERNAL_MASTER_FANOUT = int(os.getenv("INTERNAL_MASTER_FANOUT", "8"))
+NAME_CACHE_TTL = 600  # 10 minutes
+NAME_NEGATIVE_TTL = int(os.getenv("NAME_NEGATIVE_TTL", "60"))
+NAME_TTL_JITTER = 0.1  # +/-10% so entries written together don't expire together
+_NAME_MISSING = ""  # cached for ids that failed or have no name
+
+def _jittered(ttl: int) -> int:
+    return max(1, int(ttl * random.uniform(1 - NAME_TTL_JITTER, 1 + NAME_TTL_JITTER)))
+
+def _name_namespace(request) -> str:
+    tenant = getattr(request, "tenant_info", None) or getattr(getattr(request, "user", None), "tenant", None) or {}
+    return tenant.get("alias") or get_current_tenant() or "_"
 
 def _forward_auth_headers(request):
     h = {"Accept": "application/json"}
@@ -307,22 +548,105 @@ def resolve_name(kind: str, obj_id: int | None, request) -> str | None:
     """
     kind: 'buildings' | 'floors' | 'units' | 'sites' (if you have it)
     Tries cache -> GET http://127.0.0.1:8000/api/<kind>/<id>/ -> cache
-    Returns the 'name' or None on error.
+    Returns the 'name' or None on error (briefly cached as missing).
     """
     if not obj_id:
         return None
-    cache_key = f"name:{kind}:{obj_id}"
-    cached = cache.get(cache_key)
-    if cached is not None:
-        return cached
+    return resolve_names(kind, [obj_id], request).get(obj_id)
+
+def resolve_names(kind: str, ids: Iterable[int | None], request) -> Dict[int, str | None]:
+    """
+    Bulk version of resolve_name.
+
+    Reads all ids with one cache.get_many, fetches the misses with one batched upstream call
+    (INTERNAL_MASTER_BATCH) or a fan-out of at most INTERNAL_MASTER_FANOUT parallel GETs,
+    and writes the results back with cache.set_many. Keys are namespaced by tenant alias.
+    Ids that fail or have no name are cached as missing for NAME_NEGATIVE_TTL seconds.
+    Both TTLs are jittered.
+
+    :return: Mapping of every truthy id to its name, or None when it could not be resolved.
+    """
+    ids = list(dict.fromkeys(i for i in ids if i))
+    if not ids:
+        return {}
+    namespace = _name_namespace(request)
+    keys = {obj_id: f"name:{namespace}:{kind}:{obj_id}" for obj_id in ids}
+    cached = cache.get_many(list(keys.values()))
+    names = {obj_id: cached.get(keys[obj_id]) or None for obj_id in ids}
+
+    misses = [obj_id for obj_id in ids if keys[obj_id] not in cached]
+    if misses:
+        headers = _forward_auth_headers(request)
+        if INTERNAL_MASTER_BATCH:
+            fetched = _fetch_names_batch(kind, misses, headers)
+        else:
+            with ThreadPoolExecutor(max_workers=min(INTERNAL_MASTER_FANOUT, len(misses))) as pool:
+                fetched = dict(zip(misses, pool.map(lambda i: _fetch_name(kind, i, headers), misses)))
+        found = {obj_id: fetched[obj_id] for obj_id in misses if fetched.get(obj_id)}
+        missing = [obj_id for obj_id in misses if obj_id not in found]
+        if found:
+            cache.set_many({keys[obj_id]: name for obj_id, name in found.items()}, _jittered(NAME_CACHE_TTL))
+        if missing:
+            cache.set_many({keys[obj_id]: _NAME_MISSING for obj_id in missing}, _jittered(NAME_NEGATIVE_TTL))
+        names.update(found)
+    return names
+
+def _fetch_name(kind: str, obj_id: int, headers: Dict[str, str]) -> str | None:
     try:
         url = f"{INTERNAL_MASTER_BASE}/api/{kind}/{obj_id}/"
-        resp = requests.get(url, headers=_forward_auth_headers(request), timeout=INTERNAL_MASTER_TIMEOUT)
+        resp = http_client.get(url, headers=headers, timeout=INTERNAL_MASTER_TIMEOUT)
         if resp.status_code == 200:
-            name = (resp.json() or {}).get("name")
-            if name:
-                cache.set(cache_key, name, 600)  # 10 minutes
-                return name
+            return (resp.json() or {}).get("name") or None
     except Exception:
         pass
-    return None
\ No newline at end of file
+    return None
+
+def _fetch_names_batch(kind: str, ids: list, headers: Dict[str, str]) -> Dict[int, str | None]:
+    try:
+        url = f"{INTERNAL_MASTER_BASE}/api/{kind}/"
+        params = {"ids": ",".join(str(i) for i in ids), "page_size": str(len(ids))}
+        resp = http_client.get(url, headers=headers, params=params, timeout=INTERNAL_MASTER_TIMEOUT)
+        if resp.status_code == 200:
+            body = resp.json() or []
+            rows = body.get("results", []) if isinstance(body, dict) else body
+            by_id = {str(row.get("id")): row.get("name") for row in rows if isinstance(row, dict)}
+            return {obj_id: by_id.get(str(obj_id)) or None for obj_id in ids}
+    except Exception:
+        pass
+    return {}
+
+
+class NameResolver:
+    """
+    Per-request memo over resolve_names.
+
+    ``prime`` it with every id on a page so each kind costs one bulk lookup; ``name``
+    then reads from memory.
+    """
+
+    def __init__(self, request):
+        self.request = request
+        self._names: Dict[str, Dict[int, str | None]] = {}
+
+    def prime(self, kind: str, ids: Iterable[int | None]) -> None:
+        known = self._names.setdefault(kind, {})
+        missing = [i for i in ids if i and i not in known]
+        if missing:
+            known.update(resolve_names(kind, missing, self.request))
+
+    def name(self, kind: str, obj_id: int | None) -> str | None:
+        if not obj_id:
+            return None
+        self.prime(kind, [obj_id])
+        return self._names[kind].get(obj_id)
+
+
+def get_name_resolver(request) -> NameResolver:
+    """
+    Return the NameResolver attached to ``request``, creating it on first use.
+    """
+    resolver = getattr(request, "_name_resolver", None)
+    if resolver is None:
+        resolver = NameResolver(request)
+        request._name_resolver = resolver
+    return resolver
@@ -2,21 +2,24 @@ from django.forms import ValidationError
 from django.shortcuts import render
 
 # Create your views here.
+import hmac
 import json
 import logging
-from django.db.models import Q, Count, Sum, Min
+from django.db.models import Q, Count, Sum, Min, F, Prefetch, Window
+from django.db.models.functions import RowNumber
 
 import os
 import traceback
-from io import StringIO
 from datetime import timedelta
 
 from django.conf import settings
-from django.core.management import call_command
 from django.db import connections, transaction, IntegrityError
 from django.db.models import Q, Count, Sum
 from django.utils import timezone
-from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.exceptions import ObjectDoesNotExist, ValidationError as DjangoValidationError
+from django.http import Http404
+from django.views.decorators.csrf import csrf_exempt
+from asgiref.sync import sync_to_async
 
 from rest_framework import viewsets, status, filters, exceptions, generics, permissions
 from rest_framework.decorators import action
@@ -27,9 +30,13 @@ from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.exceptions import ValidationError as DRFValidationError
 from rest_framework.pagination import PageNumberPagination
-from fitout.db_router import set_current_tenant
+from fitout.db_router import read_alias, reset_current_tenant, set_current_tenant
+from django.urls import reverse
+from .tenant_migrations import migration_orchestrator, scan_schema_drift
+from .tenant_prewarm import default_tenants, prewarm_tenants
+from .tenant_registry import tenant_registry
 from .utils import ensure_alias_for_client
-from .serializers import PaymentModeSerializer
+from .serializers import PaymentModeSerializer, annotate_related_counts
 
 
 from rest_framework import status
@@ -74,6 +81,17 @@ def _get_tenant_from_request(request):
             tenant = {"alias": alias}
     return tenant
 
+def _request_alias(request) -> str:
+    """
+    Alias for this request. Reuses the TenantContext resolved during authentication and only
+    falls back to resolving from the user/header when there is none.
+    """
+    request.user  # triggers DRF authentication, which attaches tenant_context
+    ctx = getattr(request, "tenant_context", None)
+    if ctx is not None:
+        return ctx.alias
+    return _ensure_alias_ready(_get_tenant_from_request(request))
+
 def _ensure_alias_ready(tenant: dict) -> str:
     if not tenant or "alias" not in tenant:
         raise exceptions.AuthenticationFailed("Tenant alias missing in token.")
@@ -92,31 +110,143 @@ def _ensure_alias_ready(tenant: dict) -> str:
 
 
 class RouterTenantContextMixin(APIView):
-    """Ensure DB router knows the tenant BEFORE any serializer/query runs."""
+    """
+    Ensure DB router knows the tenant BEFORE any serializer/query runs. The tenant is set
+    for this request's context only and reset (not cleared) when the response is finalized.
+    """
     def initial(self, request, *args, **kwargs):
-        alias = _ensure_alias_ready(_get_tenant_from_request(request))
-        set_current_tenant(alias)
+        alias = _request_alias(request)
+        request._tenant_token = set_current_tenant(alias)
         return super().initial(request, *args, **kwargs)
 
     def finalize_response(self, request, response, *args, **kwargs):
         try:
-            return super().finalize_response(request, response, *args, **kwargs)
+            response = super().finalize_response(request, response, *args, **kwargs)
+            ctx = getattr(request, "tenant_context", None)
+            if ctx is not None:
+                response["Server-Timing"] = f"tenant;dur={ctx.resolve_ms:.2f}"
+            return response
         finally:
-            set_current_tenant(None)
+            token = getattr(request, "_tenant_token", None)
+            if token is not None:
+                request._tenant_token = None
+                reset_current_tenant(token)
 
 
 class TenantSerializerContextMixin:
     def get_serializer_context(self):
         ctx = super().get_serializer_context()
-        alias = _ensure_alias_ready(_get_tenant_from_request(self.request))
-        ctx["alias"] = alias
+        ctx["alias"] = _request_alias(self.request)
+        ctx["tenant"] = getattr(self.request, "tenant_context", None)
         ctx["request"] = self.request
         return ctx
 
 
 class _TenantDBMixin:
     def _alias(self) -> str:
-        return _ensure_alias_ready(_get_tenant_from_request(self.request))
+        """
+        Tenant alias for this request's queries: a read replica for safe methods when the
+        tenant has an available one and the caller has not just written, else the primary.
+        """
+        alias = _request_alias(self.request)
+        if self.request.method in permissions.SAFE_METHODS:
+            return read_alias(alias)
+        return alias
+
+
+class AsyncReadMixin:
+    """
+    Serves ``list`` and ``retrieve`` as async handlers so, under ASGI, a request does not
+    hold a thread while its queries run or while a slow client reads the response. Writes
+    keep the regular sync DRF path (run in a worker thread). Only active with
+    ``settings.ASYNC_READ_VIEWS`` (set by ``fitout/asgi.py``); under WSGI the plain sync
+    view is returned, since Django would wrap every async view in ``async_to_sync``.
+
+    Authentication, permission checks, filtering and serialization stay sync DRF code and
+    run through ``sync_to_async``; counts, page slices and single-object lookups use the
+    async ORM. The tenant is set in the request's own context and reset on finalize, as in
+    ``RouterTenantContextMixin``.
+    """
+    async_actions = ("list", "retrieve")
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        if not getattr(settings, "ASYNC_READ_VIEWS", False):
+            return view
+        async_methods = {method for method, name in (actions or {}).items() if name in cls.async_actions}
+        if not async_methods:
+            return view
+        if "get" in async_methods:
+            async_methods.add("head")
+        sync_view = sync_to_async(view)
+
+        async def async_view(request, *args, **kwargs):
+            if request.method.lower() not in async_methods:
+                return await sync_view(request, *args, **kwargs)
+            self = cls(**initkwargs)
+            self.action_map = dict(actions)
+            if "get" in actions and "head" not in actions:
+                self.action_map["head"] = actions["get"]
+            for method, name in self.action_map.items():
+                setattr(self, method, getattr(self, name))
+            self.request = request
+            self.args = args
+            self.kwargs = kwargs
+            return await self.async_dispatch(request, *args, **kwargs)
+
+        async_view.cls = view.cls
+        async_view.initkwargs = view.initkwargs
+        async_view.actions = view.actions
+        async_view.__name__ = view.__name__
+        async_view.__doc__ = view.__doc__
+        return csrf_exempt(async_view)
+
+    async def async_dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            alias = await sync_to_async(_request_alias)(request)
+            request._tenant_token = set_current_tenant(alias)
+            await sync_to_async(APIView.initial)(self, request, *args, **kwargs)
+            handler = getattr(self, f"a{self.action}")
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def alist(self, request, *args, **kwargs):
+        paginator = self.paginator
+        if paginator is not None and not hasattr(paginator, "apaginate_queryset"):
+            # Paginator without async support: keep its sync behaviour.
+            return await sync_to_async(self.list)(request, *args, **kwargs)
+
+        queryset = await sync_to_async(self.filter_queryset)(self.get_queryset())
+        if paginator is not None:
+            page = await paginator.apaginate_queryset(queryset, request, view=self)
+            if page is not None:
+                data = await sync_to_async(lambda: self.get_serializer(page, many=True).data)()
+                return self.get_paginated_response(data)
+        objects = [obj async for obj in queryset]
+        data = await sync_to_async(lambda: self.get_serializer(objects, many=True).data)()
+        return Response(data)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        queryset = await sync_to_async(self.filter_queryset)(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            instance = await queryset.aget(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except (ObjectDoesNotExist, ValueError, TypeError, DjangoValidationError):
+            raise Http404
+        self.check_object_permissions(request, instance)
+        data = await sync_to_async(lambda: self.get_serializer(instance).data)()
+        return Response(data)
 
 
 
@@ -144,9 +274,16 @@ class RegisterDBByClientAPIView(APIView):
             )
 
             if settings.DEBUG or str(os.getenv("ASSET_AUTO_MIGRATE", "0")) == "1":
-                out = StringIO()
-                call_command("migrate", "api", database=alias, interactive=False, verbosity=1, stdout=out)
-                logger.info("Migrated app 'api' on %s\n%s", alias, out.getvalue())
+                job_id = migration_orchestrator.submit([alias])
+                return Response(
+                    {
+                        "detail": "Alias ready; migration queued",
+                        "alias": alias,
+                        "job_id": job_id,
+                        "status_url": reverse("register-db-job", args=[job_id]),
+                    },
+                    status=202,
+                )
 
             try:
                 connections[alias].close()
@@ -160,6 +297,51 @@ class RegisterDBByClientAPIView(APIView):
             return Response({"detail": str(e)}, status=400)
 
 
+class HasInternalToken(permissions.BasePermission):
+    """Allows service-to-service callers presenting INTERNAL_REGISTER_DB_TOKEN as X-Internal-Token."""
+
+    def has_permission(self, request, view):
+        expected = os.getenv("INTERNAL_REGISTER_DB_TOKEN", "").strip()
+        provided = request.headers.get("X-Internal-Token", "")
+        return bool(expected) and hmac.compare_digest(provided, expected)
+
+
+class MigrationJobAPIView(APIView):
+    """Poll a tenant migration job started by register-db."""
+    authentication_classes = []
+    permission_classes = [HasInternalToken]
+
+    def get(self, request, job_id):
+        job = migration_orchestrator.job(job_id)
+        if job is None:
+            return Response({"detail": "Unknown or expired job."}, status=404)
+        return Response(job)
+
+
+class TenantSchemaDriftAPIView(APIView):
+    """
+    Schema-drift report across tenant databases (see ``tenant_schema_drift``).
+
+    Query params: by default only aliases registered in this worker are scanned (no
+    Accounts lookups); ``scope=directory`` also resolves and scans every tenant in the
+    shared directory. ``all=1`` keeps current tenants in the per-tenant rows.
+    """
+    authentication_classes = []
+    permission_classes = [HasInternalToken]
+
+    def get(self, request):
+        unresolved = []
+        with tenant_registry.hold(tenant_registry.aliases()) as hold:
+            if request.query_params.get("scope") == "directory":
+                resolved = prewarm_tenants(default_tenants(), connect=False, hold=hold)
+                unresolved = [{"tenant": r["tenant"], "error": r["error"]} for r in resolved if not r["ok"]]
+            report = scan_schema_drift(sorted(hold.aliases))
+        report["unresolved"] = unresolved
+        if request.query_params.get("all") != "1":
+            report["tenants"] = [row for row in report["tenants"] if row["status"] != "current"]
+        return Response(report)
+
+
 from .serializers import (
     FitOutRequestSerializer,
     FitoutDeviationSerializer,
@@ -178,9 +360,10 @@ from .serializers import (
     FitoutGuideSerializer,
 )
 
-from .pagination import StandardResultsSetPagination
+from .pagination import KeysetOrPageNumberPagination, KeysetPagination, StandardResultsSetPagination
 
 class FitOutRequestViewSet(
+    AsyncReadMixin,
     RouterTenantContextMixin,
     TenantSerializerContextMixin,
     _TenantDBMixin,
@@ -188,7 +371,8 @@ class FitOutRequestViewSet(
 ):
     serializer_class = FitOutRequestSerializer
     permission_classes = [IsAuthenticated]
-    pagination_class = StandardResultsSetPagination
+    # ?cursor= for keyset pages, ?page= still works
+    pagination_class = KeysetOrPageNumberPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = [ 'tower_id', 'flat_id']
     search_fields = ['id', 'tower_id', 'flat_id', 'contractor_name']
@@ -336,16 +520,26 @@ class PaymentModeViewSet(
     queryset = PaymentMode.objects.all()
     serializer_class = PaymentModeSerializer
 
+    def get_queryset(self):
+        alias = self._alias()
+        if not alias:
+            raise DRFValidationError("Tenant DB alias missing.")
+        return annotate_related_counts(PaymentMode.objects.using(alias), self.get_serializer_class())
+
     def perform_create(self, serializer):
         name = self.request.data.get("name")
         if not name:
             raise ValidationError({"name": "This field is required."})
 
-        if PaymentMode.objects.filter(name=name).exists():
+        if PaymentMode.objects.using(self._alias()).filter(name=name).exists():
             raise ValidationError({"name": f"PaymentMode with name '{name}' already exists."})
 
         serializer.save()        
 
+# Chats embedded per deviation in list/retrieve payloads (newest first).
+DEVIATION_CHAT_PREFETCH_LIMIT = int(os.getenv("DEVIATION_CHAT_PREFETCH_LIMIT", "50"))
+
+
 class FitoutDeviationViewSet(RouterTenantContextMixin, TenantSerializerContextMixin, _TenantDBMixin, viewsets.ModelViewSet):
     """
     API endpoint for managing fit-out deviations.
@@ -359,10 +553,35 @@ class FitoutDeviationViewSet(RouterTenantContextMixin, TenantSerializerContextMi
     ordering_fields = ['id', 'created_at']
 
     def get_queryset(self):
+        """
+        Deviations with everything the serializer nests loaded up front: status joined,
+        images and the latest DEVIATION_CHAT_PREFETCH_LIMIT non-deleted chats (returned
+        oldest first) prefetched from the same tenant DB. Newest deviations come first. A
+        page costs the same four queries (count, deviations, images, chats) whatever its size.
+        """
         alias = self._alias()
         if not alias:
             raise DRFValidationError("Tenant DB alias missing.")
-        return FitoutDeviation.objects.using(alias).all()
+        # Capped per deviation with a window rank rather than a slice, which Prefetch
+        # cannot re-filter when attaching results to each deviation.
+        chats = (
+            FitoutDeviationChat.objects.using(alias)
+            .filter(is_deleted=False)
+            .annotate(chat_rank=Window(
+                RowNumber(), partition_by=F("deviation_id"), order_by=[F("timestamp").desc(), F("id").desc()],
+            ))
+            .filter(chat_rank__lte=DEVIATION_CHAT_PREFETCH_LIMIT)
+            .order_by("timestamp", "id")
+        )
+        return (
+            FitoutDeviation.objects.using(alias)
+            .order_by("-created_at", "-id")
+            .select_related("status")
+            .prefetch_related(
+                Prefetch("images", queryset=FitoutDeviationImage.objects.using(alias).order_by("uploaded_at", "id")),
+                Prefetch("chats", queryset=chats),
+            )
+        )
 
     def perform_create(self, serializer):
         alias = self._alias()
@@ -393,7 +612,7 @@ class FitoutDeviationViewSet(RouterTenantContextMixin, TenantSerializerContextMi
             raise DRFValidationError(str(e))
 
 
-class FitoutChecklistViewSet(RouterTenantContextMixin, TenantSerializerContextMixin, _TenantDBMixin, viewsets.ModelViewSet):
+class FitoutChecklistViewSet(AsyncReadMixin, RouterTenantContextMixin, TenantSerializerContextMixin, _TenantDBMixin, viewsets.ModelViewSet):
     """
     API endpoint for managing fit-out checklists.
     """
@@ -406,10 +625,25 @@ class FitoutChecklistViewSet(RouterTenantContextMixin, TenantSerializerContextMi
     ordering_fields = ['id', 'created_at', 'status']
 
     def get_queryset(self):
+        """
+        Checklists with their whole question/option tree: one query per level for the
+        page (checklists, questions, options), all on the tenant DB, so the nested
+        serializers render from memory.
+        """
         alias = self._alias()
         if not alias:
             raise DRFValidationError("Tenant DB alias missing.")
-        return FitoutChecklist.objects.using(alias).all()
+        options = QuestionOption.objects.using(alias).order_by("id")
+        questions = (
+            ChecklistQuestion.objects.using(alias)
+            .order_by("id")
+            .prefetch_related(Prefetch("options", queryset=options))
+        )
+        return (
+            FitoutChecklist.objects.using(alias)
+            .order_by("-created_at", "-id")
+            .prefetch_related(Prefetch("questions", queryset=questions))
+        )
 
     def perform_create(self, serializer):
         alias = self._alias()
@@ -453,9 +687,10 @@ class FitoutChecklistViewSet(RouterTenantContextMixin, TenantSerializerContextMi
 
 
 
-class FitoutRequestChatViewSet(RouterTenantContextMixin, TenantSerializerContextMixin, _TenantDBMixin,viewsets.ModelViewSet):
+class FitoutRequestChatViewSet(AsyncReadMixin, RouterTenantContextMixin, TenantSerializerContextMixin, _TenantDBMixin,viewsets.ModelViewSet):
     queryset = FitoutRequestChat.objects.all()
     serializer_class = FitoutRequestChatSerializer
+    pagination_class = KeysetPagination
 
     def perform_create(self, serializer):
         fitout_request_id = self.request.data.get("fitout_request")
@@ -471,10 +706,11 @@ class FitoutRequestChatViewSet(RouterTenantContextMixin, TenantSerializerContext
         serializer.save(fitout_request=fitout_request)
         
         
-class FitoutDeviationChatViewSet(RouterTenantContextMixin, TenantSerializerContextMixin, _TenantDBMixin, viewsets.ModelViewSet):
+class FitoutDeviationChatViewSet(AsyncReadMixin, RouterTenantContextMixin, TenantSerializerContextMixin, _TenantDBMixin, viewsets.ModelViewSet):
     queryset = FitoutDeviationChat.objects.all()
     serializer_class = FitoutDeviationChatSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         alias = self._alias()
@@ -483,16 +719,31 @@ class FitoutDeviationChatViewSet(RouterTenantContextMixin, TenantSerializerConte
         return FitoutDeviationChat.objects.using(alias).all()
 
 
-class ChecklistAnswerViewSet(RouterTenantContextMixin, TenantSerializerContextMixin, _TenantDBMixin, viewsets.ModelViewSet):
+class ChecklistAnswerViewSet(AsyncReadMixin, RouterTenantContextMixin, TenantSerializerContextMixin, _TenantDBMixin, viewsets.ModelViewSet):
     queryset = ChecklistAnswer.objects.all()
     serializer_class = ChecklistAnswerSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
+        """
+        Answers joined with their question and selected option in the base query.
+        ``?fitout_request=<id>`` narrows to one request's answers in question order,
+        served by the (fitout_request, question) index. Keyset pages (``?cursor=``) are
+        ordered by (created_at, id), so the two cannot be combined.
+        """
         alias = self._alias()
         if not alias:
             raise DRFValidationError("Tenant DB alias missing.")
-        return ChecklistAnswer.objects.using(alias).all()
+        qs = ChecklistAnswer.objects.using(alias).select_related("question", "question_option")
+        fitout_request = self.request.query_params.get("fitout_request")
+        if fitout_request:
+            if not fitout_request.isdigit():
+                raise DRFValidationError({"fitout_request": "Must be an integer id."})
+            if self.paginator.cursor_query_param in self.request.query_params:
+                raise DRFValidationError({"cursor": "Not supported with fitout_request, which returns answers in question order."})
+            qs = qs.filter(fitout_request_id=int(fitout_request)).order_by("question_id", "id")
+        return qs
 
 
 class AnnexureViewSet(RouterTenantContextMixin, TenantSerializerContextMixin, _TenantDBMixin, viewsets.ModelViewSet):
@@ -1,3 +1,9 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
 from rest_framework.authentication import BaseAuthentication
 from rest_framework import exceptions
 from django.conf import settings
@@ -6,8 +12,13 @@ import jwt
 
 
 
+from api.tenant_state import TenantContext
 from api.utils import ensure_alias_for_client 
 
+JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", "4096"))
+# Upper bound on how long a verified token is reused, also used for tokens without "exp".
+JWT_CACHE_MAX_TTL = int(os.getenv("JWT_CACHE_MAX_TTL", "900"))
+
 class SimpleJWTUser:
     def __init__(self, user_id, username, permissions, tenant=None):
         self.id = user_id
@@ -18,6 +29,71 @@ class SimpleJWTUser:
     def is_authenticated(self):
         return True
 
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU of already-verified tokens, keyed by SHA-256 digest of the token.
+
+    Each entry holds the user built from the claims and expires at the token's ``exp``
+    (capped at ``max_ttl``); expired entries are never returned.
+    """
+    def __init__(self, maxsize=JWT_CACHE_SIZE, max_ttl=JWT_CACHE_MAX_TTL):
+        self.maxsize = maxsize
+        self.max_ttl = max_ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    @staticmethod
+    def _key(token):
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token):
+        key = self._key(token)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, user = entry
+            if now >= expires_at:
+                del self._entries[key]
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return user
+
+    def put(self, token, exp, user):
+        expires_at = time.time() + self.max_ttl
+        if exp is not None:
+            expires_at = min(expires_at, float(exp))
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (expires_at, user)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+verified_tokens = VerifiedTokenCache()
+
+
 class ExternalJWTAuthentication(BaseAuthentication):
     def authenticate(self, request):
         auth_header = request.headers.get("Authorization", "")
@@ -26,6 +102,29 @@ class ExternalJWTAuthentication(BaseAuthentication):
 
         token = auth_header.split(" ", 1)[1]
 
+        user = verified_tokens.get(token)
+        if user is None:
+            user = self._verify(token)
+
+        tenant_info = user.tenant
+        started = time.perf_counter()
+        try:
+            if tenant_info["client_username"]:
+                ensure_alias_for_client(client_username=tenant_info["client_username"])
+            elif tenant_info["client_id"]:
+                ensure_alias_for_client(client_id=int(tenant_info["client_id"]))
+            elif tenant_info["alias"].startswith("client_"):
+                ensure_alias_for_client(client_id=int(tenant_info["alias"].split("_", 1)[1]))
+            else:
+                raise RuntimeError("No client identifier present to register tenant DB.")
+        except Exception as e:
+            raise exceptions.AuthenticationFailed(f"Tenant DB setup failed: {e}")
+
+        request.tenant_info = tenant_info
+        request.tenant_context = TenantContext(**tenant_info, resolve_ms=(time.perf_counter() - started) * 1000)
+        return (user, token)
+
+    def _verify(self, token):
         try:
             payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
         except jwt.ExpiredSignatureError as e:
@@ -44,18 +143,6 @@ class ExternalJWTAuthentication(BaseAuthentication):
         if not username:
             raise exceptions.AuthenticationFailed("Username missing in token.")
 
-        try:
-            if client_username:
-                ensure_alias_for_client(client_username=client_username)
-            elif client_id:
-                ensure_alias_for_client(client_id=int(client_id))
-            elif tenant_alias.startswith("client_"):
-                ensure_alias_for_client(client_id=int(tenant_alias.split("_", 1)[1]))
-            else:
-                raise RuntimeError("No client identifier present to register tenant DB.")
-        except Exception as e:
-            raise exceptions.AuthenticationFailed(f"Tenant DB setup failed: {e}")
-
         tenant_info = {
             "alias": tenant_alias,
             "client_username": client_username,
@@ -70,7 +157,6 @@ class ExternalJWTAuthentication(BaseAuthentication):
             permissions=payload.get("permissions", {}),
             tenant=tenant_info,
         )
-        request.tenant_info = tenant_info
-        return (user, token)
+        verified_tokens.put(token, payload.get("exp"), user)
+        return user
     
- 
\ No newline at end of file
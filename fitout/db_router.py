@@ -1,14 +1,111 @@
 # UserService/db_router.py
-from contextvars import ContextVar
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
 
+from django.db import connections
+
+# Seconds reads stay on the primary after a write in the same request or session.
+TENANT_READ_STICKY_SECONDS = float(os.getenv("TENANT_READ_STICKY_SECONDS", "5"))
+
+# The only tenant state: one value per thread under WSGI and per task under ASGI/async views.
 _current_tenant = ContextVar("current_tenant", default=None)
+# monotonic() deadline until which tenant reads go to the primary (read-your-writes).
+_primary_until = ContextVar("primary_until", default=0.0)
+
+_replicas_lock = threading.Lock()
+_replicas: dict[str, tuple[str, ...]] = {}  # primary alias -> replica aliases
+_replica_primary: dict[str, str] = {}  # replica alias -> primary alias
+_available_replicas: set[str] = set()  # replicas reachable and within the lag limit
+
+def set_current_tenant(alias: str | None) -> Token:
+    """Set the tenant alias for the current context; pass the returned token to reset_current_tenant."""
+    return _current_tenant.set(alias)
 
-def set_current_tenant(alias: str | None):
-    _current_tenant.set(alias)
+def reset_current_tenant(token: Token) -> None:
+    """Restore the tenant that was current before the matching set_current_tenant."""
+    _current_tenant.reset(token)
 
 def get_current_tenant() -> str | None:
     return _current_tenant.get()
 
+@contextmanager
+def tenant_scope(alias: str | None):
+    """Route tenant queries to ``alias`` inside the block, restoring the previous tenant on exit."""
+    token = _current_tenant.set(alias)
+    try:
+        yield alias
+    finally:
+        _current_tenant.reset(token)
+
+
+# ---------------------------------------------------------------------------
+# Read replicas
+# ---------------------------------------------------------------------------
+def set_replicas(primary: str, replicas) -> None:
+    """
+    Register the replica aliases of a tenant primary. New replicas take reads only once
+    the health monitor has found them reachable and within the lag limit.
+    """
+    replicas = tuple(replicas)
+    with _replicas_lock:
+        for old in _replicas.pop(primary, ()):
+            _replica_primary.pop(old, None)
+            if old not in replicas:
+                _available_replicas.discard(old)
+        if replicas:
+            _replicas[primary] = replicas
+            for replica in replicas:
+                _replica_primary[replica] = primary
+
+def set_replica_available(alias: str, available: bool) -> None:
+    with _replicas_lock:
+        if available and alias in _replica_primary:
+            _available_replicas.add(alias)
+        else:
+            _available_replicas.discard(alias)
+
+def is_replica(alias: str | None) -> bool:
+    return alias in _replica_primary
+
+def primary_of(alias: str | None) -> str | None:
+    """The primary for a replica alias; any other alias is returned unchanged."""
+    return _replica_primary.get(alias, alias)
+
+def has_replicas() -> bool:
+    return bool(_replicas)
+
+def pin_primary(seconds: float = TENANT_READ_STICKY_SECONDS) -> None:
+    """Send this context's tenant reads to the primary for ``seconds`` (after a write)."""
+    _primary_until.set(time.monotonic() + seconds)
+
+def primary_pinned() -> bool:
+    return _primary_until.get() > time.monotonic()
+
+@contextmanager
+def read_scope(pinned: bool = False):
+    """Fresh read-your-writes state for one request, optionally starting pinned to the primary."""
+    token = _primary_until.set(time.monotonic() + TENANT_READ_STICKY_SECONDS if pinned else 0.0)
+    try:
+        yield
+    finally:
+        _primary_until.reset(token)
+
+def read_alias(primary: str | None) -> str | None:
+    """
+    Alias to read ``primary``'s data from: a random available (and still registered)
+    replica, or the primary itself when it has none, none is available, or reads are
+    pinned after a write.
+    """
+    replicas = _replicas.get(primary)
+    if not replicas or primary_pinned():
+        return primary
+    candidates = [r for r in replicas if r in _available_replicas and r in connections.databases]
+    return random.choice(candidates) if candidates else primary
+
 
 class MultiTenantRouter:
     """
@@ -24,21 +121,37 @@ class MultiTenantRouter:
     def db_for_read(self, model, **hints):
         app = model._meta.app_label
         if app in self.master_apps:  return "default"
-        if app in self.tenant_apps:  return self._tenant_for_hints(hints)
+        if app in self.tenant_apps:
+            instance = hints.get("instance")
+            if instance is not None and instance._state.db:
+                return instance._state.db  # related lookups follow the instance's database
+            if hints.get("tenant_db"):
+                return hints["tenant_db"]
+            return read_alias(get_current_tenant())
         return None
 
     def db_for_write(self, model, **hints):
         app = model._meta.app_label
         if app in self.master_apps:  return "default"
-        if app in self.tenant_apps:  return self._tenant_for_hints(hints)
+        if app in self.tenant_apps:
+            tenant = primary_of(self._tenant_for_hints(hints))
+            if tenant and has_replicas():
+                pin_primary()
+            return tenant
         return None
 
     def allow_relation(self, obj1, obj2, **hints):
-        # Only allow relations within same DB
-        db1 = self.db_for_read(obj1._meta.model, **hints) or "default"
-        db2 = self.db_for_read(obj2._meta.model, **hints) or "default"
+        # Only allow relations within same DB (a replica counts as its primary)
+        db1 = primary_of(self._db_for_model(obj1._meta.model, hints)) or "default"
+        db2 = primary_of(self._db_for_model(obj2._meta.model, hints)) or "default"
         return db1 == db2
 
+    def _db_for_model(self, model, hints):
+        app = model._meta.app_label
+        if app in self.master_apps:  return "default"
+        if app in self.tenant_apps:  return self._tenant_for_hints(hints)
+        return None
+
     def allow_migrate(self, db, app_label, model_name=None, **hints):
         if app_label in self.master_apps:  
             return db == "default"
@@ -0,0 +1,10 @@
+# fitout/gunicorn.conf.py
+# Usage: gunicorn fitout.wsgi -c fitout/gunicorn.conf.py
+# Set TENANT_PREWARM_ON_START=1 to register tenant aliases and open their first
+# connections in every worker before it accepts traffic.
+
+
+def post_worker_init(worker):
+    from api.tenant_prewarm import prewarm_worker
+
+    prewarm_worker()
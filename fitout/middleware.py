@@ -1,9 +1,68 @@
-from django.utils.deprecation import MiddlewareMixin
-from .db_router import set_current_tenant
-
-class TenantMiddleware(MiddlewareMixin):
-    def process_request(self, request):
-        set_current_tenant(request.headers.get("X-Tenant"))
-    def process_response(self, request, response):
-        set_current_tenant(None)
-        return response
\ No newline at end of file
+import hashlib
+import os
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.core.cache import caches
+from .db_router import TENANT_READ_STICKY_SECONDS, has_replicas, read_scope, tenant_scope
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+TENANT_READ_STICKY_CACHE_ALIAS = os.getenv("TENANT_READ_STICKY_CACHE_ALIAS", "tenant_sticky")
+
+class TenantMiddleware:
+    """
+    Gives every request its own tenant scope, reset when the response is returned, under
+    both WSGI and ASGI. The initial tenant comes from X-Tenant-Alias (or the legacy X-Tenant)
+    header, the same hint the API views fall back to; views replace it with the tenant from
+    the authenticated token inside a nested scope.
+
+    Unsafe requests (POST, PUT, PATCH, DELETE) read from the primary throughout, so
+    validation and lookups done while writing never see a lagging replica. When tenants
+    have read replicas, a successful write also pins the caller's session
+    (Authorization header or session cookie) to the primary for TENANT_READ_STICKY_SECONDS,
+    in the shared TENANT_READ_STICKY_CACHE_ALIAS cache so it holds across workers.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        key = self._sticky_key(request)
+        pinned = request.method not in SAFE_METHODS or bool(key and caches[TENANT_READ_STICKY_CACHE_ALIAS].get(key))
+        with tenant_scope(self._header_tenant(request)), read_scope(pinned):
+            response = self.get_response(request)
+        if key and self._is_write(request, response):
+            caches[TENANT_READ_STICKY_CACHE_ALIAS].set(key, 1, TENANT_READ_STICKY_SECONDS)
+        return response
+
+    async def __acall__(self, request):
+        key = self._sticky_key(request)
+        pinned = request.method not in SAFE_METHODS or bool(key and await caches[TENANT_READ_STICKY_CACHE_ALIAS].aget(key))
+        with tenant_scope(self._header_tenant(request)), read_scope(pinned):
+            response = await self.get_response(request)
+        if key and self._is_write(request, response):
+            await caches[TENANT_READ_STICKY_CACHE_ALIAS].aset(key, 1, TENANT_READ_STICKY_SECONDS)
+        return response
+
+    @staticmethod
+    def _header_tenant(request):
+        return request.headers.get("X-Tenant-Alias") or request.headers.get("X-Tenant")
+
+    @staticmethod
+    def _sticky_key(request):
+        if not has_replicas():
+            return None
+        session = request.headers.get("Authorization") or request.COOKIES.get("sessionid")
+        if not session:
+            return None
+        return "tenant_sticky:" + hashlib.sha256(session.encode()).hexdigest()[:32]
+
+    @staticmethod
+    def _is_write(request, response):
+        return request.method not in SAFE_METHODS and response.status_code < 400
@@ -39,6 +39,12 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 env = environ.Env()
 environ.Env.read_env(str(BASE_DIR / '.env'))
 
+# Per-host runtime state: file caches, migration locks and last-known-good Accounts data.
+# Owned by the app and owner-only; never a shared directory such as /tmp, because the
+# file cache unpickles whatever it finds there.
+STATE_DIR = Path(env('FITOUT_STATE_DIR', default=str(BASE_DIR / 'var')))
+STATE_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+
 SECRET_KEY = env.str("SECRET_KEY")
 
 # Application definition
@@ -106,6 +112,10 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'fitout.wsgi.application'
 
+# Serve list/retrieve of AsyncReadMixin viewsets as async views. fitout/asgi.py turns this
+# on; under WSGI each async view would cost an async_to_sync event loop hop per request.
+ASYNC_READ_VIEWS = env.bool('ASYNC_READ_VIEWS', default=False)
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
@@ -120,6 +130,31 @@ WSGI_APPLICATION = 'fitout.wsgi.application'
 DATABASE_ROUTERS = ['fitout.db_router.MultiTenantRouter']
 
 
+# Cache
+# 'tenants' holds tenant DB info, versions, the tenant index and migration jobs shared by
+# all workers. The file-based default (under STATE_DIR) is shared by the workers on one
+# host; point TENANT_CACHE_URL at redis://... to share across hosts. Local backends cull a third of
+# their entries once full, so they get a MAX_ENTRIES well above the number of tenants.
+# 'tenant_sticky' holds the short-lived read-your-writes pins, one per session, kept
+# apart so they cannot push tenant entries out.
+
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+    'tenants': env.cache(
+        'TENANT_CACHE_URL',
+        default='filecache://' + str(STATE_DIR / 'tenants'),
+    ),
+    'tenant_sticky': env.cache(
+        'TENANT_STICKY_CACHE_URL',
+        default='filecache://' + str(STATE_DIR / 'tenant_sticky'),
+    ),
+}
+if CACHES['tenants']['BACKEND'].endswith(('.FileBasedCache', '.LocMemCache')):
+    CACHES['tenants'].setdefault('OPTIONS', {}).setdefault(
+        'MAX_ENTRIES', env.int('TENANT_CACHE_MAX_ENTRIES', default=100000)
+    )
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 